@@ -0,0 +1,5 @@
+// Cheap per-element kernel for bench_batch.py
+// The work per call is tiny, so the cost of a call is dominated by the Python -> C transition
+double kernel(double x) {
+    return x * x + 1.0;
+}
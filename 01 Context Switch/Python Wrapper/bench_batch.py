@@ -0,0 +1,38 @@
+from lib.Importer import Importer
+from pathlib import Path
+import numpy as np
+import time
+
+# Python loop over a typed C function versus one call into the generated batch shim
+ELEMENTS = 100000
+REPEATS = 5
+
+imp = Importer()
+src = str(Path(__file__).parent / "bench_batch")
+lib = imp.c(src, typed=True)
+kernel_batch = imp.vectorize(src, "kernel")
+
+x = np.linspace(0.0, 1.0, ELEMENTS)
+
+
+def best_of(run) -> float:
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+loop = best_of(lambda: [lib.kernel(v) for v in x.tolist()])
+batch = best_of(lambda: kernel_batch(x))
+assert np.allclose(kernel_batch(x), [lib.kernel(v) for v in x.tolist()])
+
+print(f"Elements               : {ELEMENTS}")
+print(f"Python loop            : {loop / ELEMENTS * 1e9:8.1f} ns/element")
+print(f"Batch shim             : {batch / ELEMENTS * 1e9:8.1f} ns/element")
+print(f"Speedup                : {loop / batch:.0f}x")
+
+# The same works for the measurement kernel, e.g. a sweep over many iteration counts in one call:
+#   sweep = imp.vectorize(str(Path(__file__).parent / "cs"), "measure_context_switch")
+#   seconds = sweep(np.arange(1, 1001))
@@ -0,0 +1,36 @@
+from lib.Importer import LibWrapper
+import ctypes
+import timeit
+
+# Per-call overhead of the LazyCall path versus a function bound once via declare()
+# getpid() from libc is used as kernel because it does almost no work itself
+CALLS = 200000
+REPEATS = 5
+
+libc = ctypes.CDLL(None)
+
+lazy = LibWrapper(libc)
+typed = LibWrapper(libc)
+typed.declare("int getpid(void)")
+raw = libc["getpid"]
+raw.restype = ctypes.c_int
+raw.argtypes = []
+
+
+def per_call_ns(stmt) -> float:
+    best = min(timeit.repeat(stmt, number=CALLS, repeat=REPEATS))
+    return best / CALLS * 1e9
+
+
+results = {
+    "LazyCall (lib.getpid().to_int())": per_call_ns(lambda: lazy.getpid().to_int()),
+    "declare() (lib.getpid())": per_call_ns(lambda: typed.getpid()),
+    "plain ctypes": per_call_ns(lambda: raw()),
+}
+
+for name, ns in results.items():
+    print(f"{name:<35} {ns:8.1f} ns/call")
+
+lazy_ns = results["LazyCall (lib.getpid().to_int())"]
+typed_ns = results["declare() (lib.getpid())"]
+print(f"Speedup of declare() over LazyCall: {lazy_ns / typed_ns:.1f}x")
@@ -0,0 +1,7 @@
+from lib.Importer import Importer
+from pathlib import Path
+
+# Compares the build profiles of cs.c; measure_context_switch also serves as PGO training run
+imp = Importer()
+imp.compare_profiles(str(Path(__file__).parent / "cs"), lambda m: m.measure_context_switch(10000), lang="c", typed=True)
+imp.compare_profiles(str(Path(__file__).parent / "cs"), lambda m: m.measure_context_switch(10000), lang="cpp")
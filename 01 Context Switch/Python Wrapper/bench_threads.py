@@ -0,0 +1,49 @@
+from lib.Importer import Importer, map_parallel
+from pathlib import Path
+import contextlib
+import os
+import sys
+import time
+
+# Runs measure_context_switch from 1..N Python threads at once via map_parallel()
+# and reports how the per-call cost scales with the number of concurrent callers
+ITERATIONS = 20000
+MAX_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2 * (os.cpu_count() or 1)
+
+
+# measure_context_switch prints every result, keep the C stdout quiet during the runs
+@contextlib.contextmanager
+def quiet_stdout():
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def scaling(name: str, func) -> None:
+    print(f"\n{name}")
+    print(f"{'Workers':>7} {'Wall [s]':>10} {'Syscalls/s':>12} {'us/syscall':>10}")
+    for workers in range(1, MAX_WORKERS + 1):
+        with quiet_stdout():
+            start = time.perf_counter()
+            map_parallel(func, [ITERATIONS] * workers, workers=workers)
+            wall = time.perf_counter() - start
+        # Every worker performs ITERATIONS syscalls, the latency is what a single caller sees
+        calls = workers * ITERATIONS
+        print(f"{workers:>7} {wall:>10.3f} {calls / wall:>12.0f} {wall / ITERATIONS * 1e6:>10.3f}")
+
+
+imp = Importer()
+src = str(Path(__file__).parent / "cs")
+cs_c = imp.c(src, typed=True)
+cs_cpp = imp.cpp(src)
+cs_cpp_gil = imp.cpp(src, release_gil=False)
+
+scaling("C via ctypes (GIL released by ctypes)", cs_c.measure_context_switch)
+scaling("C++ via pybind11, IMPORTER_NOGIL", cs_cpp.measure_context_switch)
+scaling("C++ via pybind11, GIL held", cs_cpp_gil.measure_context_switch)
@@ -1,5 +1,7 @@
+#define _GNU_SOURCE
 #include <time.h>
 #include <stdio.h>
+#include <stdint.h>
 #include <unistd.h>
 
 double measure_context_switch(int iterations) {
@@ -20,4 +22,19 @@ double measure_context_switch(int iterations) {
     printf("Average time per call: %f seconds\n", time_spent / iterations);
 
     return time_spent;
-}
\ No newline at end of file
+}
+
+// Timestamps every iteration with CLOCK_MONOTONIC_RAW and stores its latency in nanoseconds
+// samples must hold iterations values and is allocated by the caller
+void sample_context_switch(int iterations, int64_t *samples) {
+    struct timespec prev, now;
+    clock_gettime(CLOCK_MONOTONIC_RAW, &prev);
+
+    // One clock read per iteration: its end is the start of the next one
+    for (int i = 0; i < iterations; i++) {
+        sleep(0);
+        clock_gettime(CLOCK_MONOTONIC_RAW, &now);
+        samples[i] = (int64_t)(now.tv_sec - prev.tv_sec) * 1000000000 + (now.tv_nsec - prev.tv_nsec);
+        prev = now;
+    }
+}
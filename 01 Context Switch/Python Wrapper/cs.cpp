@@ -1,6 +1,10 @@
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include "importer.h"
+#include <cstdint>
 #include <ctime>
 #include <cstdio>
+#include <time.h>
 #include <unistd.h>
 
 namespace py = pybind11;
@@ -22,8 +26,32 @@ double measure_context_switch(int iterations) {
     return time_spent;
 }
 
+// Timestamps every iteration with CLOCK_MONOTONIC_RAW and returns the latencies in nanoseconds
+py::array_t<int64_t> sample_context_switch(int iterations) {
+    py::array_t<int64_t> samples(iterations);
+    int64_t *out = samples.mutable_data();
+
+    // The array is allocated, the loop itself does not need the GIL
+    {
+        py::gil_scoped_release release;
+        timespec prev, now;
+        clock_gettime(CLOCK_MONOTONIC_RAW, &prev);
+
+        // One clock read per iteration: its end is the start of the next one
+        for (int i = 0; i < iterations; ++i) {
+            sleep(0);
+            clock_gettime(CLOCK_MONOTONIC_RAW, &now);
+            out[i] = static_cast<int64_t>(now.tv_sec - prev.tv_sec) * 1000000000 + (now.tv_nsec - prev.tv_nsec);
+            prev = now;
+        }
+    }
+    return samples;
+}
+
 PYBIND11_MODULE(cs, m) {
     m.doc() = "Context switch measurement (C++)";
-    m.def("measure_context_switch", &measure_context_switch, py::arg("iterations"),
+    m.def("measure_context_switch", &measure_context_switch, py::arg("iterations"), IMPORTER_NOGIL,
           "Measure time spent performing iterations of sleep(0)");
+    m.def("sample_context_switch", &sample_context_switch, py::arg("iterations"),
+          "Latency of every single sleep(0) in nanoseconds");
 }
\ No newline at end of file
@@ -1,15 +1,201 @@
-from lib.Importer import Importer
+from lib.Importer import Importer, C_FLAGS
+from lib.Statistics import summarize, print_summary
+from lib.SchedCounters import SchedCounters
+from lib import SyscallMatrix, PingPong, Scaling, Adaptive
 from pathlib import Path
+import argparse
+import csv
+import os
+import numpy as np
+
+HERE = Path(__file__).parent
+
+
+# Prints the scheduler counters of a run; busy_ns is the measured time to spread over the actual switches
+def print_counters(counters: SchedCounters, busy_ns: float) -> None:
+    r = counters.result
+    perf = "n/a" if r["perf_context_switches"] is None else r["perf_context_switches"]
+    migrations = "n/a" if r["perf_cpu_migrations"] is None else r["perf_cpu_migrations"]
+    print(f"  switches: voluntary {r['voluntary_switches']}, involuntary {r['involuntary_switches']}, "
+          f"perf {perf}, migrations {migrations}")
+    if r["run_ns"] is not None:
+        print(f"  schedstat: run {r['run_ns'] / 1e6:.3f} ms, wait {r['wait_ns'] / 1e6:.3f} ms, "
+              f"timeslices {r['timeslices']}")
+    if counters.switches() > 0:
+        print(f"  time per actual switch: {busy_ns / counters.switches() / 1000.0:.3f} us")
+    if counters.migrated():
+        print("  WARNING: CPU migrations during the run, results may be polluted")
+
+# argparse type for counts that must be at least 1
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return value
 
 # Importer is syntactically sugar
 imp = Importer()
 
-# Requires gcc
-cs_c = imp.c(str(Path(__file__).parent / "cs"))
-res = cs_c.measure_context_switch(100000).to_float()
-print(res)
 
-# Requires g++/c++
-cs_cpp = imp.cpp(str(Path(__file__).parent / "cs"))
-res = cs_cpp.measure_context_switch(100000)
-print(res)
\ No newline at end of file
+# Default mode: total time of sleep(0) loops from C and C++ plus per-iteration sampling
+def demo(args) -> None:
+    # Requires gcc and g++/c++, both modules are compiled concurrently
+    cs_c, cs_cpp = imp.import_many([str(HERE / "cs.c"), str(HERE / "cs.cpp")])
+
+    res = cs_c.measure_context_switch(100000).to_float()
+    print(res)
+
+    # Same library with signatures parsed from cs.c; calls skip the LazyCall wrapper
+    cs_c_typed = imp.c(str(HERE / "cs"), typed=True)
+    res = cs_c_typed.measure_context_switch(100000)
+    print(res)
+
+    res = cs_cpp.measure_context_switch(100000)
+    print(res)
+
+    # Per-iteration sampling: a latency distribution instead of one total
+    samples = np.empty(args.samples, dtype=np.int64)
+    with SchedCounters() as counters:
+        cs_c_typed.sample_context_switch(args.samples, samples)
+    print_summary("sleep(0) latency, C", summarize(samples))
+    print_counters(counters, float(samples.sum()))
+
+    with SchedCounters() as counters:
+        samples = cs_cpp.sample_context_switch(args.samples)
+    print_summary("sleep(0) latency, C++", summarize(samples))
+    print_counters(counters, float(samples.sum()))
+
+
+# Cost of cheap kernel entries (syscalls.c), optionally written as JSON/CSV
+def matrix(args) -> None:
+    lib = imp.c(str(HERE / "syscalls"), typed=True)
+    results = SyscallMatrix.run_matrix(lib, args.iterations, args.runs, args.warmup)
+    SyscallMatrix.print_matrix(results)
+    if args.json:
+        SyscallMatrix.write_json(args.json, results)
+    if args.csv:
+        SyscallMatrix.write_csv(args.csv, results)
+
+
+# Real context switches: threads/processes ping-ponging over futex, eventfd or pipe
+def pingpong(args) -> None:
+    lib = imp.c(str(HERE / "pingpong"), typed=True, flags=[*C_FLAGS, "-pthread"])
+    available = PingPong.placements()
+    rows = []
+    for placement in args.placements:
+        if placement not in available:
+            print(f"Placement {placement} is not available on this machine, skipped")
+            continue
+        cpus = available[placement]
+        for mode in args.modes:
+            for channel in args.channels:
+                with SchedCounters() as counters:
+                    samples = PingPong.run(lib, mode, channel, cpus, args.iterations, args.warmup)
+                name = f"{mode}/{channel}/{placement} (CPUs {cpus[0]}, {cpus[1]})"
+                if samples is None:
+                    print(f"{name}: failed")
+                    continue
+                summary = summarize(samples)
+                print_summary(f"Context switch {name}", summary)
+                # Samples are half round trips, the counters also include the untimed warmup
+                busy_ns = float(samples.sum()) * 2 * (args.iterations + args.warmup) / args.iterations
+                print_counters(counters, busy_ns)
+                rows.append({"mode": mode, "channel": channel, "placement": placement,
+                             "cpu_ping": cpus[0], "cpu_pong": cpus[1], **summary, **counters.result,
+                             "ns_per_actual_switch": busy_ns / max(counters.switches(), 1)})
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+# Multi-core scaling of a syscall kernel; sleep0 is the loop of measure_context_switch with wall-clock timing
+def scaling(args) -> None:
+    lib = imp.c(str(HERE / "syscalls"), typed=True)
+    kernel = getattr(lib, SyscallMatrix.KERNELS[args.kernel])
+    try:
+        rows = Scaling.sweep(kernel, args.iterations, args.max_workers, args.placement)
+    except ValueError as e:
+        raise SystemExit(f"scaling: {e}")
+    print(f"Kernel {args.kernel}, placement {args.placement}")
+    Scaling.print_curve(rows)
+    if args.csv:
+        Scaling.write_csv(args.csv, rows, args.kernel)
+
+
+# Measures in batches until the 95% CI of the median/mean is narrow enough instead of a fixed count
+def adaptive(args) -> None:
+    if args.experiment == "sleep0":
+        lib = imp.c(str(HERE / "cs"), typed=True)
+
+        def batch(n: int) -> np.ndarray:
+            samples = np.empty(n, dtype=np.int64)
+            lib.sample_context_switch(n, samples)
+            return samples
+    else:
+        lib = imp.c(str(HERE / "pingpong"), typed=True, flags=[*C_FLAGS, "-pthread"])
+
+        def batch(n: int) -> np.ndarray:
+            samples = PingPong.run(lib, args.mode, args.channel, (-1, -1), n, args.warmup)
+            if samples is None:
+                raise RuntimeError("pingpong failed")
+            return samples
+
+    _, info = Adaptive.run_adaptive(batch, args.precision, args.statistic, args.budget, args.batch_size)
+    Adaptive.print_adaptive(info)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Context switch and syscall measurements")
+    parser.set_defaults(func=demo, samples=100000)
+    modes = parser.add_subparsers(title="modes")
+
+    p = modes.add_parser("demo", help="sleep(0) totals and latency distribution (default)")
+    p.add_argument("--samples", type=int, default=100000)
+    p.set_defaults(func=demo)
+
+    p = modes.add_parser("matrix", help="syscall cost matrix")
+    p.add_argument("--iterations", type=positive_int, default=100000, help="calls per run")
+    p.add_argument("--runs", type=positive_int, default=10, help="timed runs per kernel")
+    p.add_argument("--warmup", type=int, default=10000, help="untimed calls before the runs")
+    p.add_argument("--json", help="write results as JSON to this file")
+    p.add_argument("--csv", help="write results as CSV to this file")
+    p.set_defaults(func=matrix)
+
+    p = modes.add_parser("pingpong", help="thread/process ping-pong context switches")
+    p.add_argument("--modes", nargs="+", choices=list(PingPong.MODES), default=list(PingPong.MODES))
+    p.add_argument("--channels", nargs="+", choices=list(PingPong.CHANNELS), default=list(PingPong.CHANNELS))
+    p.add_argument("--placements", nargs="+", choices=list(PingPong.PLACEMENTS), default=list(PingPong.PLACEMENTS))
+    p.add_argument("--iterations", type=int, default=100000, help="timed round trips per configuration")
+    p.add_argument("--warmup", type=int, default=1000, help="untimed round trips before measuring")
+    p.add_argument("--csv", help="write one summary row per configuration (ns) to this file")
+    p.set_defaults(func=pingpong)
+
+    p = modes.add_parser("scaling", help="throughput and latency with 1..N concurrent worker processes")
+    p.add_argument("--kernel", choices=list(SyscallMatrix.KERNELS), default="sleep0")
+    p.add_argument("--max-workers", type=positive_int, default=len(os.sched_getaffinity(0)),
+                   help="largest number of concurrent workers (default: CPUs in the affinity mask)")
+    p.add_argument("--placement", choices=Scaling.PLACEMENTS, default="distinct",
+                   help="distinct: one CPU per worker, packed: all workers on one CPU, none: no pinning")
+    p.add_argument("--iterations", type=int, default=100000, help="calls per worker")
+    p.add_argument("--csv", help="write the scaling curve to this file")
+    p.set_defaults(func=scaling)
+
+    p = modes.add_parser("adaptive", help="measure until the confidence interval is narrow enough")
+    p.add_argument("--experiment", choices=["sleep0", "pingpong"], default="sleep0")
+    p.add_argument("--mode", choices=list(PingPong.MODES), default="thread", help="pingpong only")
+    p.add_argument("--channel", choices=list(PingPong.CHANNELS), default="futex", help="pingpong only")
+    p.add_argument("--warmup", type=int, default=1000, help="pingpong only: untimed round trips per batch")
+    p.add_argument("--statistic", choices=list(Adaptive.STATISTICS), default="median")
+    p.add_argument("--precision", type=float, default=0.01, help="target relative CI half-width")
+    p.add_argument("--budget", type=float, default=60.0, help="time budget in seconds")
+    p.add_argument("--batch-size", type=positive_int, default=10000)
+    p.set_defaults(func=adaptive)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
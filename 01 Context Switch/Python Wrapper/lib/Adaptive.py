@@ -0,0 +1,95 @@
+import math
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+Z_95 = 1.959964
+
+
+# Distribution-free 95% CI of the median from order statistics (normal approximation of the binomial)
+def median_ci(samples: np.ndarray) -> Tuple[float, float]:
+    n = samples.size
+    half = Z_95 * math.sqrt(n) / 2.0
+    lo = max(int(math.floor(n / 2.0 - half)), 0)
+    hi = min(int(math.ceil(n / 2.0 + half)), n - 1)
+    part = np.partition(samples, (lo, hi))
+    return float(part[lo]), float(part[hi])
+
+
+# 95% CI of the mean (normal approximation)
+def mean_ci(samples: np.ndarray) -> Tuple[float, float]:
+    mean = float(samples.mean())
+    half = Z_95 * float(samples.std(ddof=1)) / math.sqrt(samples.size)
+    return mean - half, mean + half
+
+
+STATISTICS = {
+    "median": (lambda s: float(np.median(s)), median_ci),
+    "mean": (lambda s: float(s.mean()), mean_ci),
+}
+
+
+# The CI costs O(n), so it is only re-evaluated after the sample count grew by this factor;
+# this keeps the total analysis time linear in the number of samples
+CHECK_GROWTH = 1.1
+
+
+# Calls batch(batch_size) until the 95% CI half-width of the statistic is at most precision * statistic,
+# time_budget seconds have passed or max_samples are collected
+# batch returns the latencies of one batch as NumPy array
+def run_adaptive(batch: Callable[[int], np.ndarray], precision: float = 0.01, statistic: str = "median",
+                 time_budget: float = 60.0, batch_size: int = 10000,
+                 max_samples: int = 100_000_000) -> Tuple[np.ndarray, Dict[str, Any]]:
+    estimate, ci = STATISTICS[statistic]
+    # Preallocated buffer that doubles when full, samples are never concatenated
+    buffer = np.empty(batch_size)
+    count = 0
+    next_check = 0
+    start = time.perf_counter()
+    while True:
+        new = np.asarray(batch(batch_size), dtype=float)
+        if count + new.size > buffer.size:
+            grown = np.empty(max(2 * buffer.size, count + new.size))
+            grown[:count] = buffer[:count]
+            buffer = grown
+        buffer[count:count + new.size] = new
+        count += new.size
+        elapsed = time.perf_counter() - start
+        if count < next_check and elapsed < time_budget and count < max_samples:
+            continue
+        next_check = int(count * CHECK_GROWTH)
+
+        samples = buffer[:count]
+        if count >= 2:
+            value = estimate(samples)
+            lo, hi = ci(samples)
+            relative = (hi - lo) / 2.0 / abs(value) if value else math.inf
+        else:
+            # Too few samples for a CI, only the time budget or sample limit can end the run
+            value, lo, hi, relative = math.nan, math.nan, math.nan, math.inf
+        if relative <= precision:
+            reason = "precision reached"
+        elif elapsed >= time_budget:
+            reason = "time budget exhausted"
+        elif count >= max_samples:
+            reason = "sample limit reached"
+        else:
+            continue
+        return samples.copy(), {
+            "statistic": statistic,
+            "value": value,
+            "ci_low": lo,
+            "ci_high": hi,
+            "relative_half_width": relative,
+            "samples": count,
+            "seconds": elapsed,
+            "reason": reason,
+        }
+
+
+def print_adaptive(info: Dict[str, Any], unit: str = "us", scale: float = 1000.0) -> None:
+    print(f"Stopped after {info['samples']} samples in {info['seconds']:.2f} s ({info['reason']})")
+    print(f"  {info['statistic']:<7} {info['value'] / scale:10.3f} {unit}")
+    print(f"  95% CI  [{info['ci_low'] / scale:.3f}, {info['ci_high'] / scale:.3f}] {unit}, "
+          f"half-width {info['relative_half_width'] * 100:.2f}%")
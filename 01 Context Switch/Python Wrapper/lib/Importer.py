@@ -8,8 +8,147 @@ import sys
 import importlib.util
 import sysconfig
 import shutil
+import re
+import os
+import functools
+import contextlib
+import fcntl
+import threading
+import time
+import traceback
+import weakref
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Tuple, Dict, List, Optional, Union
+
+# C type names accepted in declarations (pointers are handled in __resolve_type)
+C_TYPES = {
+    "void": None,
+    "char": ctypes.c_char,
+    "int": ctypes.c_int,
+    "unsigned": ctypes.c_uint,
+    "unsigned int": ctypes.c_uint,
+    "long": ctypes.c_long,
+    "unsigned long": ctypes.c_ulong,
+    "long long": ctypes.c_longlong,
+    "unsigned long long": ctypes.c_ulonglong,
+    "size_t": ctypes.c_size_t,
+    "int32_t": ctypes.c_int32,
+    "uint32_t": ctypes.c_uint32,
+    "int64_t": ctypes.c_int64,
+    "uint64_t": ctypes.c_uint64,
+    "float": ctypes.c_float,
+    "double": ctypes.c_double,
+}
+
+# Headers shipped with the Importer, e.g. importer.h for pybind11 modules
+INCLUDE_DIR = pathlib.Path(__file__).resolve().parent / "include"
+
+# Default compiler flags, "-shared -fPIC" is always added
+C_FLAGS = ["-O3", "-std=c11"]
+CPP_FLAGS = ["-O3", "-std=c++17"]
+
+# Build profiles selectable per import, their flags are appended to the language defaults
+# "pgo" instruments the build, runs a training callable and rebuilds with the recorded profile
+PROFILES = {
+    "default": [],
+    "native": ["-march=native"],
+    "lto": ["-flto"],
+    "native-lto": ["-march=native", "-flto"],
+    "pgo": [],
+}
+
+# free() of the C runtime, used to release buffers malloc'ed by loaded libraries
+LIBC_FREE = ctypes.CDLL(None).free
+LIBC_FREE.argtypes = [ctypes.c_void_p]
+LIBC_FREE.restype = None
+
+# exit() of the C runtime, unlike os._exit() it runs atexit handlers and destructors
+LIBC_EXIT = ctypes.CDLL(None).exit
+LIBC_EXIT.argtypes = [ctypes.c_int]
+
+# Words that can be part of a type and therefore are never a parameter name
+TYPE_WORDS = {w for name in C_TYPES for w in name.split()} | {"const", "volatile", "*"}
+
+# Matches top-level function definitions like "double foo(int a) {"
+PROTOTYPE_PATTERN = re.compile(r"^([A-Za-z_][\w \t\*]*?[\s\*])([A-Za-z_]\w*)\s*\(([^)]*)\)\s*\{", re.MULTILINE)
+
+# Parses C signatures like "double measure_context_switch(int iterations)"
+# c_restype/c_argtypes keep the normalized C spelling, e.g. for generated shims
+class Signature:
+    def __init__(self, name: str, c_restype: str, c_argtypes: List[str]) -> None:
+        self.name = name
+        self.c_restype = c_restype
+        self.c_argtypes = c_argtypes
+        self.restype = self.__resolve_type(c_restype)
+        self.argtypes = [self.__resolve_type(t) for t in c_argtypes]
+
+    @classmethod
+    def parse(cls, decl: str) -> "Signature":
+        match = re.fullmatch(r"\s*(.+?[\s\*])([A-Za-z_]\w*)\s*\(([^)]*)\)\s*;?\s*", decl)
+        if not match:
+            raise ValueError(f"Invalid C signature: {decl}")
+        ret, name, params = match.groups()
+        return cls(name, cls.__normalize(ret), cls.__split_params(params))
+
+    # Finds all non-static function definitions in a C source file
+    @classmethod
+    def from_source(cls, src: pathlib.Path) -> Dict[str, "Signature"]:
+        code = src.read_text()
+        code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
+        code = re.sub(r"//[^\n]*", "", code)
+        found = {}
+        for ret, name, params in PROTOTYPE_PATTERN.findall(code):
+            if "static" in ret.split() or name in ("if", "for", "while", "switch"):
+                continue
+            try:
+                found[name] = cls(name, cls.__normalize(ret), cls.__split_params(params))
+            except ValueError:
+                # Skip functions whose types cannot be expressed with ctypes
+                continue
+        return found
+
+    @classmethod
+    def __split_params(cls, params: str) -> List[str]:
+        params = params.strip()
+        if params in ("", "void"):
+            return []
+        return [cls.__normalize(cls.__strip_param_name(p)) for p in params.split(",")]
+
+    # "int iterations" -> "int", "double *out" -> "double *", unnamed "int" stays as is
+    @staticmethod
+    def __strip_param_name(param: str) -> str:
+        tokens = param.replace("*", " * ").split()
+        if len(tokens) > 1 and tokens[-1] not in TYPE_WORDS:
+            tokens = tokens[:-1]
+        return " ".join(tokens)
+
+    # "const  double*" -> "double *"
+    @staticmethod
+    def __normalize(name: str) -> str:
+        words = [w for w in name.replace("*", " ").split() if w not in ("const", "extern", "inline", "volatile")]
+        depth = name.count("*")
+        return " ".join(words) + (" " + "*" * depth if depth else "")
+
+    @staticmethod
+    def __resolve_type(name: str) -> Any:
+        depth = name.count("*")
+        base = name.replace("*", " ").strip()
+        if depth == 0:
+            if base not in C_TYPES:
+                raise ValueError(f"Unsupported C type: {name.strip()}")
+            return C_TYPES[base]
+        if depth == 1 and base == "char":
+            return ctypes.c_char_p
+        if depth == 1 and base == "void":
+            return ctypes.c_void_p
+        if base not in C_TYPES or C_TYPES[base] is None:
+            raise ValueError(f"Unsupported C type: {name.strip()}")
+        resolved = C_TYPES[base]
+        for _ in range(depth):
+            resolved = ctypes.POINTER(resolved)
+        return resolved
 
 # Only used for C methods
 class LazyCall:
@@ -39,12 +178,12 @@ class LazyCall:
             array_type = ctypes.POINTER(ctypes.c_int)
             self.func.restype = array_type
             result = self.func(*self.__convert_args())
-            return [result[i] for i in range(length)]
+            return result[:length]
         elif element_type == float:
             array_type = ctypes.POINTER(ctypes.c_double)
             self.func.restype = array_type
             result = self.func(*self.__convert_args())
-            return [result[i] for i in range(length)]
+            return result[:length]
         elif element_type == str:
             array_type = ctypes.POINTER(ctypes.c_char_p)
             self.func.restype = array_type
@@ -53,11 +192,41 @@ class LazyCall:
         else:
             raise ValueError(f"Unsupported element type: {element_type}")
 
+    # Calls C function lazily and wraps the returned pointer as NumPy array without copying
+    # free=None: memory stays owned by C (e.g. a static buffer) and must outlive the array
+    # free=True: memory was malloc'ed and is released with libc free() once the array is garbage collected
+    # free=<ctypes function>: same, but the given C function is called with the pointer instead
+    def to_numpy(self, length: int, dtype: Any = np.float64, free: Union[None, bool, Callable[..., Any]] = None) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        self.func.restype = ctypes.c_void_p
+        address = self.func(*self.__convert_args())
+        if not address:
+            if length == 0:
+                return np.empty(0, dtype=dtype)
+            raise ValueError("C function returned NULL")
+        pointer = ctypes.cast(address, ctypes.POINTER(np.ctypeslib.as_ctypes_type(dtype)))
+        array = np.ctypeslib.as_array(pointer, shape=(length,))
+        if free:
+            release = LIBC_FREE if free is True else free
+            # Views keep the array alive through .base, so the memory is released after the last view
+            weakref.finalize(array, release, ctypes.c_void_p(address))
+        return array
+
+    # Calls C function lazily with a Python allocated array appended as last argument
+    # C only fills the buffer, Python owns the memory and nothing has to be freed
+    # The stored arguments stay untouched, so the same LazyCall can fill several buffers
+    def into(self, out: np.ndarray) -> np.ndarray:
+        self.func.restype = None
+        self.func(*self.__convert_args((*self.args, out)))
+        return out
+
     # Convert arguments to C types
-    def __convert_args(self):
+    def __convert_args(self, args: Optional[Tuple[Any, ...]] = None):
         out = []
-        for a in self.args:
-            if isinstance(a, str):
+        for a in self.args if args is None else args:
+            if isinstance(a, np.ndarray):
+                out.append(LazyCall.__as_pointer(a))
+            elif isinstance(a, str):
                 out.append(ctypes.c_char_p(a.encode()))
             elif isinstance(a, int):
                 out.append(ctypes.c_int(a))
@@ -67,6 +236,13 @@ class LazyCall:
                 out.append(a)
         return out
 
+    # NumPy arrays are passed as pointer to their data (buffer protocol, no copy)
+    @staticmethod
+    def __as_pointer(array: np.ndarray) -> ctypes.c_void_p:
+        if not array.flags.c_contiguous:
+            raise ValueError("Only C-contiguous arrays can be passed to C")
+        return ctypes.c_void_p(array.ctypes.data)
+
 # Only used for C methods
 class FunctionWrapper:
     def __init__(self, lib: ctypes.CDLL, name: str) -> None:
@@ -78,50 +254,317 @@ class FunctionWrapper:
         func = getattr(self._lib, self._name)
         return LazyCall(func, args)
 
+# ctypes type codes of the numeric C types that NumPy arrays can stand in for
+NUMERIC_CODES = set("bBhHiIlLqQfd")
+
+# Pointer argument type for bound functions that also accepts C-contiguous NumPy arrays
+@functools.lru_cache(maxsize=None)
+def array_pointer(pointer_type: Any) -> Any:
+    dtype = np.dtype(pointer_type._type_)
+
+    class ArrayPointer(pointer_type):
+        @classmethod
+        def from_param(cls, obj: Any) -> Any:
+            if isinstance(obj, np.ndarray):
+                if obj.dtype != dtype or not obj.flags.c_contiguous:
+                    raise TypeError(f"expected a C-contiguous {dtype} array, got {obj.dtype}")
+                return obj.ctypes.data_as(pointer_type)
+            return pointer_type.from_param(obj)
+
+    return ArrayPointer
+
+# Calls a generated batch shim (see Importer.vectorize), the loop over all elements runs in C
+# Arguments are broadcast against each other like NumPy ufunc arguments
+class BatchFunction:
+    def __init__(self, func: Callable[..., Any], signature: Signature) -> None:
+        self._func = func
+        self.signature = signature
+        self._dtypes = [np.dtype(t) for t in signature.argtypes]
+        self._out_dtype = None if signature.restype is None else np.dtype(signature.restype)
+
+    def __call__(self, *args, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if len(args) != len(self._dtypes):
+            raise TypeError(f"{self.signature.name}() takes {len(self._dtypes)} arguments ({len(args)} given)")
+        arrays = np.broadcast_arrays(*[np.asarray(a) for a in args])
+        shape = arrays[0].shape
+        arrays = [np.ascontiguousarray(a, dtype=d) for a, d in zip(arrays, self._dtypes)]
+        pointers = [a.ctypes.data for a in arrays]
+        if self._out_dtype is not None:
+            if out is None:
+                out = np.empty(shape, dtype=self._out_dtype)
+            elif out.shape != shape or out.dtype != self._out_dtype or not out.flags.c_contiguous:
+                raise ValueError(f"out must be a C-contiguous {self._out_dtype} array of shape {shape}")
+            pointers.append(out.ctypes.data)
+        self._func(int(np.prod(shape)), *pointers)
+        return out
+
 # Only used for C libs
 class LibWrapper:
     def __init__(self, lib: ctypes.CDLL) -> None:
         self._lib = lib
+        self._bound: Dict[str, Any] = {}
+
+    # Binds a C function once with fixed types, e.g. declare("double f(int n)")
+    # Afterwards lib.f is the plain ctypes function and returns values directly
+    def declare(self, signature: str) -> Callable[..., Any]:
+        sig = Signature.parse(signature)
+        return self.bind(sig.name, sig.restype, sig.argtypes)
+
+    # Binds a C function once with explicit ctypes restype and argtypes
+    def bind(self, name: str, restype: Any, argtypes: Optional[List[Any]] = None) -> Callable[..., Any]:
+        # Item access creates a private function pointer, so LazyCall cannot change its restype
+        func = self._lib[name]
+        func.restype = restype
+        func.argtypes = [array_pointer(t) if self.__is_numeric_pointer(t) else t for t in argtypes or []]
+        self._bound[name] = func
+        # Instance attributes are found before __getattr__ is consulted
+        setattr(self, name, func)
+        return func
+
+    @staticmethod
+    def __is_numeric_pointer(t: Any) -> bool:
+        return isinstance(t, type) and issubclass(t, ctypes._Pointer) and \
+            getattr(t._type_, "_type_", None) in NUMERIC_CODES
+
+    # Binds every non-static function definition found in a C source file
+    def declare_source(self, src: pathlib.Path) -> Dict[str, Callable[..., Any]]:
+        return {name: self.bind(name, sig.restype, sig.argtypes) for name, sig in Signature.from_source(src).items()}
 
     # Exposes all C functions within the pylib
     def __getattr__(self, name: str) -> FunctionWrapper:
         return FunctionWrapper(self._lib, name)
 
+# Compiler flags for Python and pybind11 headers, resolved once per process
+@functools.lru_cache(maxsize=None)
+def pybind11_includes() -> List[str]:
+    try:
+        import pybind11
+    except ImportError:
+        return subprocess.check_output([sys.executable, "-m", "pybind11", "--includes"]).decode().strip().split()
+    paths = [sysconfig.get_path("include"), sysconfig.get_path("platinclude"), pybind11.get_include()]
+    return [f"-I{p}" for p in dict.fromkeys(paths)]
+
+# Runs func once per element of args on a thread pool and returns the results in order
+# Tuples are unpacked into several arguments
+# This only scales if func releases the GIL: ctypes functions of Importer.c() always do,
+# pybind11 functions only if they are bound with IMPORTER_NOGIL
+def map_parallel(func: Callable[..., Any], args: List[Any], workers: Optional[int] = None) -> List[Any]:
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return list(pool.map(lambda a: func(*a) if isinstance(a, tuple) else func(a), args))
+
+# Per-user build cache, overridable with IMPORTER_BUILD_DIR
+def default_build_dir() -> pathlib.Path:
+    if os.environ.get("IMPORTER_BUILD_DIR"):
+        return pathlib.Path(os.environ["IMPORTER_BUILD_DIR"])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return pathlib.Path(cache_home) / "os-experiments-importer"
+
 # Load C libs or Cpp classes
 class Importer:
-    def __init__(self) -> None:
-        self.build_dir = pathlib.Path(".build")
-        self.build_dir.mkdir(exist_ok=True)
+    # build_dir defaults to a per-user cache shared by all working directories and processes
+    def __init__(self, build_dir: Optional[str] = None) -> None:
+        self.build_dir = pathlib.Path(build_dir or default_build_dir())
+        self.build_dir.mkdir(parents=True, exist_ok=True)
         self.ext_suffix = sysconfig.get_config_var("EXT_SUFFIX") or sysconfig.get_config_var("SO")
+        # Python ABI the C++ modules are built for, part of every cache key
+        self.python_abi = f"{sys.implementation.cache_tag}{self.ext_suffix}-{platform.machine()}"
+        # Seconds spent in the last import of each path submitted via submit()/import_many()
+        self.build_times: Dict[str, float] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Artifacts this instance actually compiled (cache misses)
+        self.compiled: List[str] = []
+
+    # Imports a .c or .cpp source in the background and returns a future of the loaded module
+    # The compilers run as separate processes, so the pool threads only wait for them
+    # Keyword arguments are passed to c()/cpp()
+    def submit(self, path: str, **kwargs) -> Future:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="importer")
+        return self._pool.submit(self.__import_timed, path, kwargs)
+
+    # Imports several .c/.cpp sources concurrently and prints the time spent per module
+    def import_many(self, paths: List[str], **kwargs) -> List[Any]:
+        futures = [self.submit(path, **kwargs) for path in paths]
+        modules = [f.result() for f in futures]
+        for path in paths:
+            print(f"{pathlib.Path(path).name:<30} {self.build_times[path]:8.3f} s")
+        return modules
+
+    def __import_timed(self, path: str, kwargs: Dict[str, Any]) -> Any:
+        suffix = pathlib.Path(path).suffix
+        if suffix not in (".c", ".cpp"):
+            raise ValueError(f"Cannot tell C from C++ for {path}, expected a .c or .cpp suffix")
+        start = time.perf_counter()
+        mod = self.c(path, **kwargs) if suffix == ".c" else self.cpp(path, **kwargs)
+        self.build_times[path] = time.perf_counter() - start
+        return mod
 
     # Loads a Cpp class
-    def cpp(self, path: str):
+    # profile selects a build profile from PROFILES, "pgo" needs a train callable that exercises the module
+    # release_gil controls the IMPORTER_NOGIL marker from lib/include/importer.h for bound functions
+    def cpp(self, path: str, flags: Optional[List[str]] = None, profile: str = "default",
+            train: Optional[Callable[[Any], Any]] = None, release_gil: bool = True):
         src = pathlib.Path(path).with_suffix(".cpp")
         if not src.exists():
             raise FileNotFoundError(src)
-        out = self.build_dir / f"{src.stem}_cpp"
+        flags = list(CPP_FLAGS if flags is None else flags) + pybind11_includes()
+        flags += [f"-I{INCLUDE_DIR}", f"-DIMPORTER_RELEASE_GIL={int(release_gil)}"]
+        target = self.__ensure_built("c++", src, "cpp", flags, profile, train, lambda t: self.__load_cpp(src, t))
+        return self.__load_cpp(src, target)
+
+    # Loads a C pylib
+    # typed=True binds all functions with the prototypes found in the source file
+    # profile selects a build profile from PROFILES, "pgo" needs a train callable that exercises the library
+    def c(self, path: str, typed: bool = False, flags: Optional[List[str]] = None, profile: str = "default",
+          train: Optional[Callable[[Any], Any]] = None) -> LibWrapper:
+        src = pathlib.Path(path).with_suffix(".c")
+        if not src.exists():
+            raise FileNotFoundError(src)
+        flags = list(C_FLAGS if flags is None else flags)
+        target = self.__ensure_built("gcc", src, "c", flags, profile, train, lambda t: self.__load_c(src, t, typed))
+        return self.__load_c(src, target, typed)
+
+    # Builds path with every given profile, runs bench on each and reports the timing delta to "default"
+    # lang is "c" or "cpp", further keyword arguments are passed to c()/cpp()
+    # bench also serves as PGO training run unless train is given
+    def compare_profiles(self, path: str, bench: Callable[[Any], Any], lang: str = "c",
+                         profiles: Tuple[str, ...] = ("default", "native", "lto", "pgo"),
+                         train: Optional[Callable[[Any], Any]] = None, repeat: int = 5, **kwargs) -> Dict[str, float]:
+        load = self.c if lang == "c" else self.cpp
+        timings = {}
+        for profile in profiles:
+            mod = load(path, profile=profile, train=train or bench, **kwargs)
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                bench(mod)
+                runs.append(time.perf_counter() - start)
+            timings[profile] = min(runs)
+
+        baseline = timings.get("default", next(iter(timings.values())))
+        print(f"{'Profile':<12} {'Best [s]':>12} {'Delta':>9}")
+        for profile, seconds in timings.items():
+            print(f"{profile:<12} {seconds:12.6f} {(seconds / baseline - 1) * 100:+8.1f}%")
+        return timings
+
+    # Generates and caches a C shim that applies a scalar C function to whole NumPy arrays in one foreign call
+    # signature is a C prototype or the name of a function defined in the source file
+    # Keyword arguments are passed to c(), e.g. flags or profile
+    def vectorize(self, path: str, signature: str, **kwargs) -> BatchFunction:
+        src = pathlib.Path(path).with_suffix(".c").resolve()
+        if not src.exists():
+            raise FileNotFoundError(src)
+        if "(" in signature:
+            sig = Signature.parse(signature)
+        else:
+            found = Signature.from_source(src)
+            if signature not in found:
+                raise ValueError(f"No function {signature} with supported types found in {src}")
+            sig = found[signature]
+        if not sig.c_argtypes or any("*" in t for t in [sig.c_restype, *sig.c_argtypes]):
+            raise ValueError(f"Only functions with scalar arguments and result can be vectorized: {sig.name}")
+
+        code = self.__batch_source(src, sig)
+        digest = hashlib.sha256(code.encode()).hexdigest()[:16]
+        shim = self.build_dir / f"{src.stem}_{sig.name}_batch-{digest}.c"
+        if not shim.exists():
+            tmp = pathlib.Path(f"{shim}.tmp-{os.getpid()}-{threading.get_ident()}")
+            tmp.write_text(code)
+            os.replace(tmp, shim)
+
+        lib = self.c(str(shim), **kwargs)
+        argtypes = [ctypes.c_size_t] + [ctypes.c_void_p] * (len(sig.argtypes) + (sig.restype is not None))
+        func = lib.bind(f"{sig.name}_batch", None, argtypes)
+        return BatchFunction(func, sig)
 
-        if self.__needs_rebuild(src, out):
-            target = self.__build_cpp(src, out)
+    # The shim includes the original source, so it is rebuilt whenever that source changes
+    @staticmethod
+    def __batch_source(src: pathlib.Path, sig: Signature) -> str:
+        params = ", ".join(f"const {t} *a{i}" for i, t in enumerate(sig.c_argtypes))
+        call = f"{sig.name}({', '.join(f'a{i}[i]' for i in range(len(sig.c_argtypes)))})"
+        if sig.c_restype == "void":
+            body = f"{call};"
         else:
-            target = str(out) + ".so"
+            params += f", {sig.c_restype} *out"
+            body = f"out[i] = {call};"
+        include = str(src).replace("\\", "\\\\").replace('"', '\\"')
+        # The source comes first: feature test macros such as _GNU_SOURCE only take effect
+        # if they are defined before the first system header is included
+        return (f"/* Generated by Importer.vectorize() */\n"
+                f"#include \"{include}\"\n"
+                f"#include <stddef.h>\n\n"
+                f"void {sig.name}_batch(size_t n, {params}) {{\n"
+                f"    for (size_t i = 0; i < n; i++) {{\n"
+                f"        {body}\n"
+                f"    }}\n"
+                f"}}\n")
 
+    @staticmethod
+    def __load_cpp(src: pathlib.Path, target: str):
         spec = importlib.util.spec_from_file_location(src.stem, target)
         mod = importlib.util.module_from_spec(spec)
         sys.modules[src.stem] = mod
         spec.loader.exec_module(mod)
         return mod
 
-    # Loads a C pylib
-    def c(self, path: str) -> LibWrapper:
-        src = pathlib.Path(path).with_suffix(".c")
-        if not src.exists():
-            raise FileNotFoundError(src)
-        out = self.build_dir / f"{src.stem}_c"
-        if self.__needs_rebuild(src, out):
-            self.__build_c(src, out)
-        lib = ctypes.CDLL(str(out) + ".so")
-        return LibWrapper(lib)
+    @staticmethod
+    def __load_c(src: pathlib.Path, target: str, typed: bool) -> LibWrapper:
+        lib = LibWrapper(ctypes.CDLL(target))
+        if typed:
+            lib.declare_source(src)
+        return lib
+
+    # Returns the path of an up to date build of src, compiling only if needed
+    # Each combination of source path, compiler, flags, profile and Python ABI gets its own artifact,
+    # so switching between flag sets or profiles reuses the cached variants side by side
+    def __ensure_built(self, compiler: str, src: pathlib.Path, lang: str, flags: List[str], profile: str,
+                       train: Optional[Callable[[Any], Any]], load: Callable[[str], Any]) -> str:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown build profile: {profile} (available: {', '.join(PROFILES)})")
+        if profile == "pgo" and train is None:
+            raise ValueError("Profile 'pgo' requires a train callable")
+        src = src.resolve()
+        flags = [*flags, *PROFILES[profile]]
+        key = self.__variant_key(compiler, src, [*flags, f"profile={profile}"])
+        out = self.build_dir / f"{src.stem}_{lang}-{key}"
+        if self.__needs_rebuild(out):
+            # Only one process builds a variant, the others wait and then find it up to date
+            with self.__lock(out):
+                if self.__needs_rebuild(out):
+                    if profile == "pgo":
+                        self.__build_pgo(compiler, src, out, flags, train, load)
+                    else:
+                        self.__build(compiler, src, out, flags)
+                    self.compiled.append(out.name)
+        return str(out) + ".so"
+
+    # Exclusive lock per variant, works across processes and across threads of this process
+    @staticmethod
+    @contextlib.contextmanager
+    def __lock(out: pathlib.Path):
+        with open(str(out) + ".lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __variant_key(self, compiler: str, src: pathlib.Path, flags: List[str]) -> str:
+        h = hashlib.sha256()
+        for part in (str(src), self.__compiler_id(compiler), *flags, self.python_abi):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()[:16]
+
+    # Identifies the toolchain by its resolved binary and version banner
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __compiler_id(compiler: str) -> str:
+        binary = shutil.which(compiler)
+        if binary is None:
+            raise FileNotFoundError(compiler)
+        version = subprocess.check_output([binary, "--version"]).decode().splitlines()[0]
+        return f"{os.path.realpath(binary)}\n{version}"
 
     @staticmethod
     def __create_hash(path: pathlib.Path) -> str:
@@ -142,40 +585,110 @@ class Importer:
                 return json.load(f)
         return None
 
-    def __write_info(self, info_path: pathlib.Path, src: pathlib.Path, out: pathlib.Path) -> None:
+    # Records size, mtime and content hash of every file the build depends on
+    def __dependency_info(self, deps: List[str]) -> Dict[str, Dict[str, Any]]:
+        info = {}
+        for dep in deps:
+            st = os.stat(dep)
+            info[dep] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": self.__create_hash(pathlib.Path(dep))}
+        return info
+
+    def __write_info(self, info_path: pathlib.Path, src: pathlib.Path, out: pathlib.Path,
+                     compiler: str, flags: List[str], deps: Dict[str, Dict[str, Any]]) -> None:
         data = {
             "os": platform.system(),
             "build_date": datetime.now().isoformat(),
             "src": str(src),
             "out": str(out),
-            "src_hash": self.__create_hash(src),
+            "compiler": self.__compiler_id(compiler),
+            "flags": flags,
+            "python_abi": self.python_abi,
+            "deps": deps,
         }
-        with open(info_path, "w") as f:
+        self.__write_json(info_path, data)
+
+    # Writes to a temporary file first, readers never see a half written file
+    @staticmethod
+    def __write_json(path: pathlib.Path, data: Dict[str, Any]) -> None:
+        tmp = pathlib.Path(f"{path}.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(tmp, "w") as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp, path)
 
-    def __needs_rebuild(self, src: pathlib.Path, out: pathlib.Path) -> bool:
-        info = self.__load_info(self.__info_path(out))
+    # Source and headers are only hashed if their size or mtime changed since the last build
+    def __needs_rebuild(self, out: pathlib.Path) -> bool:
+        info_path = self.__info_path(out)
+        info = self.__load_info(info_path)
         final_out = pathlib.Path(str(out) + ".so")
-        if not info or not final_out.exists():
-            return True
-        try:
-            return info.get("src_hash") != self.__create_hash(src)
-        except FileNotFoundError:
+        if not info or "deps" not in info or not final_out.exists():
             return True
+        touched = False
+        for dep, recorded in info["deps"].items():
+            try:
+                st = os.stat(dep)
+                if st.st_size == recorded["size"] and st.st_mtime_ns == recorded["mtime_ns"]:
+                    continue
+                if st.st_size != recorded["size"] or self.__create_hash(pathlib.Path(dep)) != recorded["sha256"]:
+                    return True
+            except FileNotFoundError:
+                return True
+            # Same content with new mtime (e.g. git checkout): remember it to keep the fast path
+            recorded["mtime_ns"] = st.st_mtime_ns
+            touched = True
+        if touched:
+            self.__write_json(info_path, info)
+        return False
 
-    def __build_cpp(self, src: pathlib.Path, out: pathlib.Path) -> str:
-        includes = (subprocess.check_output(["python3", "-m", "pybind11", "--includes"]).decode().strip().split())
+    # Parses a make style depfile written by -MMD, paths with spaces are escaped as "\ "
+    @staticmethod
+    def __parse_depfile(path: pathlib.Path) -> List[str]:
+        text = path.read_text().replace("\\\n", " ")
+        _, deps = re.split(r"(?<!\\):\s", text, maxsplit=1)
+        return [os.path.abspath(d.replace("\\ ", " ")) for d in re.split(r"(?<!\\)\s+", deps.strip()) if d]
 
-        built_temp = str(out) + self.ext_suffix
+    # Compiles into a temporary file that is renamed atomically, the .buildinfo is written last
+    def __build(self, compiler: str, src: pathlib.Path, out: pathlib.Path, flags: List[str]) -> None:
         final_path = str(out) + ".so"
+        tmp = f"{out}.tmp-{os.getpid()}-{threading.get_ident()}"
+        depfile = pathlib.Path(tmp + ".d")
+        try:
+            subprocess.run([compiler, *flags, "-shared", "-fPIC", "-MMD", "-MF", str(depfile), str(src), "-o", tmp + ".so"], check=True)
+            deps = self.__parse_depfile(depfile)
+            os.replace(tmp + ".so", final_path)
+        finally:
+            pathlib.Path(tmp + ".so").unlink(missing_ok=True)
+            depfile.unlink(missing_ok=True)
+        self.__write_info(self.__info_path(out), src, out, compiler, flags, self.__dependency_info(deps))
 
-        subprocess.run(["c++", "-O3", "-shared", "-fPIC", "-std=c++17", *includes, str(src), "-o", built_temp], check=True)
-
-        shutil.move(built_temp, final_path)
-        self.__write_info(self.__info_path(out), src, out)
-        return final_path
+    # Two phase profile guided build: instrumented build, training run, optimized rebuild with the profile
+    def __build_pgo(self, compiler: str, src: pathlib.Path, out: pathlib.Path, flags: List[str],
+                    train: Callable[[Any], Any], load: Callable[[str], Any]) -> None:
+        profile_dir = pathlib.Path(str(out) + ".pgo").resolve()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        # Both phases must agree on the .gcda file name, which gcc derives from -dumpbase
+        pgo_flags = [f"-fprofile-dir={profile_dir}", "-dumpbase", src.stem]
+        instrumented = pathlib.Path(str(out) + "-instrumented")
+        self.__build(compiler, src, instrumented, [*flags, *pgo_flags, "-fprofile-generate"])
+        self.__run_training(lambda: train(load(str(instrumented) + ".so")))
+        self.__build(compiler, src, out, [*flags, *pgo_flags, "-fprofile-use", "-fprofile-correction"])
+        for leftover in (pathlib.Path(str(instrumented) + ".so"), self.__info_path(instrumented)):
+            leftover.unlink(missing_ok=True)
 
-    def __build_c(self, src: pathlib.Path, out: pathlib.Path) -> None:
-        final_path = str(out) + ".so"
-        subprocess.run(["gcc", "-O3", "-shared", "-fPIC", "-std=c11", str(src), "-o", final_path], check=True)
-        self.__write_info(self.__info_path(out), src, out)
+    # Runs the training in a forked child, an extension module cannot be unloaded again
+    # The child ends with libc exit(), which runs the destructors that write the .gcda profile
+    @staticmethod
+    def __run_training(run: Callable[[], Any]) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            sys.stdout.flush()
+            sys.stderr.flush()
+            LIBC_EXIT(code)
+        _, status = os.waitpid(pid, 0)
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError("PGO training run failed")
@@ -0,0 +1,75 @@
+import os
+import pathlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Must match the MODE_* and CHANNEL_* constants in pingpong.c
+MODES = {"thread": 0, "process": 1}
+CHANNELS = {"futex": 0, "eventfd": 1, "pipe": 2}
+
+SYSFS_NODES = pathlib.Path("/sys/devices/system/node")
+SYSFS_CPUS = pathlib.Path("/sys/devices/system/cpu")
+
+# Placements in the order they are measured
+PLACEMENTS = ("unpinned", "same-cpu", "smt-sibling", "cross-core", "cross-numa")
+
+
+# "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+def parse_cpulist(text: str) -> List[int]:
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+# CPUs per NUMA node, restricted to the CPUs this process may run on
+def numa_nodes() -> Dict[int, List[int]]:
+    allowed = os.sched_getaffinity(0)
+    nodes = {}
+    for node in sorted(SYSFS_NODES.glob("node[0-9]*")):
+        cpus = [c for c in parse_cpulist((node / "cpulist").read_text()) if c in allowed]
+        if cpus:
+            nodes[int(node.name[4:])] = cpus
+    return nodes or {0: sorted(allowed)}
+
+
+# Hardware threads sharing a physical core with cpu (including cpu itself)
+def smt_siblings(cpu: int) -> List[int]:
+    try:
+        return parse_cpulist((SYSFS_CPUS / f"cpu{cpu}" / "topology" / "thread_siblings_list").read_text())
+    except OSError:
+        return [cpu]
+
+
+# CPU pairs (ping side, pong side) per placement, -1 means no pinning
+# Placements the machine cannot provide (e.g. cross-numa on a single node) are missing
+# smt-sibling shares a physical core, cross-core uses two different physical cores
+def placements() -> Dict[str, Tuple[int, int]]:
+    nodes = numa_nodes()
+    first_node = next(iter(nodes.values()))
+    first = first_node[0]
+    siblings = smt_siblings(first)
+    result = {"unpinned": (-1, -1), "same-cpu": (first, first)}
+    sibling = next((c for c in first_node if c != first and c in siblings), None)
+    if sibling is not None:
+        result["smt-sibling"] = (first, sibling)
+    other_core = next((c for c in first_node if c not in siblings), None)
+    if other_core is not None:
+        result["cross-core"] = (first, other_core)
+    if len(nodes) > 1:
+        second_node = list(nodes.values())[1]
+        result["cross-numa"] = (first_node[0], second_node[0])
+    return result
+
+
+# Runs one ping-pong configuration and returns the per-switch latencies in nanoseconds
+# lib is pingpong.c loaded with Importer.c(..., typed=True)
+def run(lib, mode: str, channel: str, cpus: Tuple[int, int], iterations: int, warmup: int) -> Optional[np.ndarray]:
+    samples = np.empty(iterations, dtype=np.int64)
+    if lib.pingpong(MODES[mode], CHANNELS[channel], cpus[0], cpus[1], warmup, iterations, samples) != 0:
+        return None
+    return samples
@@ -0,0 +1,101 @@
+import csv
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+PLACEMENTS = ("distinct", "packed", "none")
+
+# How often run_step checks whether a worker died while it waits for results
+POLL_S = 1.0
+
+
+# CPU of worker i: distinct gives every worker its own allowed CPU, packed puts all on the first one
+# distinct never lets workers share a CPU, it raises ValueError if there are more workers than CPUs
+def worker_cpu(placement: str, index: int, cpus: List[int]) -> Optional[int]:
+    if placement == "distinct":
+        if index >= len(cpus):
+            raise ValueError(f"placement distinct needs {index + 1} CPUs, only {len(cpus)} allowed")
+        return cpus[index]
+    if placement == "packed":
+        return cpus[0]
+    return None
+
+
+def _worker(kernel: Callable[[int], int], iterations: int, cpu: Optional[int], barrier, results, index: int) -> None:
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    barrier.wait()
+    start = time.monotonic_ns()
+    elapsed = kernel(iterations)
+    end = time.monotonic_ns()
+    results.put((index, start, end, elapsed))
+
+
+# Runs kernel(iterations) in `workers` processes at once; the start is synchronized with a barrier
+# kernel returns the elapsed nanoseconds of its loop (see syscalls.c) and must be loaded before the fork
+# Raises RuntimeError if a worker exits abnormally or its kernel fails, instead of waiting forever
+def run_step(kernel: Callable[[int], int], iterations: int, workers: int, placement: str) -> Dict[str, Any]:
+    ctx = mp.get_context("fork")
+    cpus = sorted(os.sched_getaffinity(0))
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(kernel, iterations, worker_cpu(placement, i, cpus), barrier, results, i))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    outcomes = []
+    try:
+        while len(outcomes) < workers:
+            try:
+                outcomes.append(results.get(timeout=POLL_S))
+            except queue.Empty:
+                # A worker that died before posting would leave the others waiting at the barrier
+                if any(p.exitcode not in (None, 0) for p in procs):
+                    raise RuntimeError(f"worker failed: exit codes {[p.exitcode for p in procs]}")
+    finally:
+        for p in procs:
+            if len(outcomes) < workers:
+                p.terminate()
+            p.join()
+    if any(p.exitcode != 0 for p in procs):
+        raise RuntimeError(f"worker failed: exit codes {[p.exitcode for p in procs]}")
+    if any(o[3] < 0 for o in outcomes):
+        raise RuntimeError("kernel failed in a worker")
+
+    # Wall time from the first start to the last end, all workers use the same monotonic clock
+    wall_ns = max(o[2] for o in outcomes) - min(o[1] for o in outcomes)
+    latencies = [o[3] / iterations for o in outcomes]
+    return {
+        "workers": workers,
+        "placement": placement,
+        "iterations": iterations,
+        "wall_s": wall_ns / 1e9,
+        "throughput_calls_per_s": workers * iterations / (wall_ns / 1e9),
+        "latency_mean_ns": sum(latencies) / workers,
+        "latency_min_ns": min(latencies),
+        "latency_max_ns": max(latencies),
+    }
+
+
+# Scaling curve for 1..max_workers concurrent workers
+def sweep(kernel: Callable[[int], int], iterations: int, max_workers: int, placement: str) -> List[Dict[str, Any]]:
+    # Checked before the first step, so an impossible sweep fails without running anything
+    worker_cpu(placement, max_workers - 1, sorted(os.sched_getaffinity(0)))
+    return [run_step(kernel, iterations, workers, placement) for workers in range(1, max_workers + 1)]
+
+
+def print_curve(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'Workers':>7} {'Wall [s]':>9} {'Calls/s':>12} {'mean ns':>10} {'min ns':>10} {'max ns':>10}")
+    for r in rows:
+        print(f"{r['workers']:>7} {r['wall_s']:>9.3f} {r['throughput_calls_per_s']:>12.0f} "
+              f"{r['latency_mean_ns']:>10.1f} {r['latency_min_ns']:>10.1f} {r['latency_max_ns']:>10.1f}")
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]], kernel: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["kernel", *rows[0]])
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({"kernel": kernel, **r})
@@ -0,0 +1,124 @@
+import ctypes
+import errno
+import os
+import platform
+import resource
+import struct
+from typing import Any, Dict, List, Optional
+
+# perf_event_open syscall numbers, the call has no libc wrapper
+PERF_EVENT_OPEN = {"x86_64": 298, "aarch64": 241, "armv7l": 364, "i686": 336, "ppc64le": 319, "riscv64": 241}
+
+PERF_TYPE_SOFTWARE = 1
+PERF_COUNT_SW_CPU_MIGRATIONS = 4
+PERF_COUNT_SW_CONTEXT_SWITCHES = 3
+# perf_event_attr flag bits
+PERF_ATTR_FLAG_INHERIT = 1 << 1
+PERF_ATTR_FLAG_EXCLUDE_HV = 1 << 6
+
+SOFTWARE_EVENTS = {
+    "perf_context_switches": PERF_COUNT_SW_CONTEXT_SWITCHES,
+    "perf_cpu_migrations": PERF_COUNT_SW_CPU_MIGRATIONS,
+}
+
+
+# First fields of struct perf_event_attr (PERF_ATTR_SIZE_VER0 = 64 bytes)
+class PerfEventAttr(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+    ]
+
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+# Opens a software counter for this process, inherited by threads and children created afterwards
+# Returns None if the kernel does not permit it (see /proc/sys/kernel/perf_event_paranoid)
+def open_software_counter(config: int) -> Optional[int]:
+    number = PERF_EVENT_OPEN.get(platform.machine())
+    if number is None:
+        return None
+    attr = PerfEventAttr(type=PERF_TYPE_SOFTWARE, size=ctypes.sizeof(PerfEventAttr), config=config,
+                         flags=PERF_ATTR_FLAG_INHERIT | PERF_ATTR_FLAG_EXCLUDE_HV)
+    fd = _libc.syscall(ctypes.c_long(number), ctypes.byref(attr), 0, -1, -1, ctypes.c_ulong(0))
+    if fd < 0:
+        err = ctypes.get_errno()
+        if err in (errno.EACCES, errno.EPERM, errno.ENOENT, errno.ENOSYS, errno.EINVAL):
+            return None
+        raise OSError(err, os.strerror(err))
+    return fd
+
+
+def read_counter(fd: int) -> int:
+    return struct.unpack("Q", os.read(fd, 8))[0]
+
+
+# run time on the CPU, time waiting on a runqueue (ns) and number of timeslices of the calling thread
+def read_schedstat() -> Optional[List[int]]:
+    try:
+        with open("/proc/thread-self/schedstat") as f:
+            return [int(v) for v in f.read().split()[:3]]
+    except (OSError, ValueError):
+        return None
+
+
+# Captures scheduler counters around a measurement:
+#     with SchedCounters() as counters:
+#         run()
+#     counters.result  # deltas, None where not available
+# getrusage covers all threads of this process plus waited-for children,
+# schedstat only the calling thread, perf counters all threads/children started inside the block
+class SchedCounters:
+    def __init__(self) -> None:
+        self.result: Dict[str, Any] = {}
+        self._fds: Dict[str, Optional[int]] = {}
+        self._perf_start: Dict[str, int] = {}
+        self._rusage_start = (0, 0)
+        self._schedstat_start: Optional[List[int]] = None
+
+    def __enter__(self) -> "SchedCounters":
+        self._fds = {name: open_software_counter(config) for name, config in SOFTWARE_EVENTS.items()}
+        self._perf_start = {name: read_counter(fd) for name, fd in self._fds.items() if fd is not None}
+        self._rusage_start = self.__rusage()
+        self._schedstat_start = read_schedstat()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        schedstat = read_schedstat()
+        rusage = self.__rusage()
+        self.result = {
+            "voluntary_switches": rusage[0] - self._rusage_start[0],
+            "involuntary_switches": rusage[1] - self._rusage_start[1],
+        }
+        for i, key in enumerate(("run_ns", "wait_ns", "timeslices")):
+            ok = schedstat is not None and self._schedstat_start is not None
+            self.result[key] = schedstat[i] - self._schedstat_start[i] if ok else None
+        for name, fd in self._fds.items():
+            self.result[name] = None if fd is None else read_counter(fd) - self._perf_start[name]
+            if fd is not None:
+                os.close(fd)
+
+    # Context switches as counted by perf if available, otherwise by getrusage
+    def switches(self) -> int:
+        if self.result.get("perf_context_switches") is not None:
+            return self.result["perf_context_switches"]
+        return self.result["voluntary_switches"] + self.result["involuntary_switches"]
+
+    # A run is polluted if the scheduler moved a thread to another CPU during it
+    def migrated(self) -> bool:
+        return bool(self.result.get("perf_cpu_migrations"))
+
+    @staticmethod
+    def __rusage():
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return own.ru_nvcsw + children.ru_nvcsw, own.ru_nivcsw + children.ru_nivcsw
@@ -0,0 +1,31 @@
+import numpy as np
+from typing import Dict
+
+# Percentiles reported for latency distributions
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+# Summarizes per-iteration latencies in nanoseconds
+# All percentiles come from a single partitioning pass over the samples
+def summarize(samples_ns: np.ndarray) -> Dict[str, float]:
+    samples_ns = np.asarray(samples_ns)
+    if samples_ns.size == 0:
+        raise ValueError("No samples")
+    quantiles = np.percentile(samples_ns, PERCENTILES)
+    summary = {
+        "count": int(samples_ns.size),
+        "min": float(samples_ns.min()),
+        "mean": float(samples_ns.mean()),
+        "std": float(samples_ns.std(ddof=1)) if samples_ns.size > 1 else 0.0,
+        "max": float(samples_ns.max()),
+    }
+    for p, q in zip(PERCENTILES, quantiles):
+        summary["median" if p == 50.0 else f"p{p:g}"] = float(q)
+    return summary
+
+
+# Prints a summary as table in microseconds
+def print_summary(name: str, summary: Dict[str, float]) -> None:
+    print(f"{name} ({summary['count']} samples)")
+    for key in ("min", "median", "p90", "p99", "p99.9", "max", "mean", "std"):
+        print(f"  {key:<7} {summary[key] / 1000.0:10.3f} us")
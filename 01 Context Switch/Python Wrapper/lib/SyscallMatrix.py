@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+import platform
+import socket
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Kernels of syscalls.c in the order they are reported
+KERNELS = {
+    "sleep0": "bench_sleep0",
+    "sched_yield": "bench_sched_yield",
+    "getpid_syscall": "bench_getpid",
+    "clock_gettime_vdso": "bench_clock_gettime_vdso",
+    "clock_gettime_syscall": "bench_clock_gettime_syscall",
+    "read_dev_zero_1b": "bench_read_dev_zero",
+    "futex_wake_nowaiter": "bench_futex_wake",
+}
+
+
+# Describes the machine, so results from many hosts and kernel versions can be merged
+def machine_info() -> Dict[str, Any]:
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "host": socket.gethostname(),
+        "kernel_release": platform.release(),
+        "machine": platform.machine(),
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+        "date": datetime.now().isoformat(),
+    }
+
+
+# Runs every kernel: one untimed warmup run, then runs timed repetitions of iterations calls each
+# A kernel that fails during warmup is skipped, a failure in a timed run raises RuntimeError
+# lib is syscalls.c loaded with Importer.c(..., typed=True)
+def run_matrix(lib, iterations: int, runs: int, warmup: int) -> List[Dict[str, Any]]:
+    if iterations < 1 or runs < 1:
+        raise ValueError(f"iterations and runs must be positive, got {iterations} and {runs}")
+    results = []
+    for name, func_name in KERNELS.items():
+        kernel = getattr(lib, func_name)
+        if warmup > 0 and kernel(warmup) < 0:
+            print(f"{name}: setup failed, skipped")
+            continue
+        totals = np.array([kernel(iterations) for _ in range(runs)])
+        if (totals < 0).any():
+            raise RuntimeError(f"{name}: timed run failed")
+        per_call = totals / iterations
+        results.append({
+            "kernel": name,
+            "iterations": iterations,
+            "runs": runs,
+            "min_ns": float(per_call.min()),
+            "median_ns": float(np.median(per_call)),
+            "mean_ns": float(per_call.mean()),
+            "std_ns": float(per_call.std(ddof=1)) if runs > 1 else 0.0,
+            "max_ns": float(per_call.max()),
+        })
+    return results
+
+
+def print_matrix(results: List[Dict[str, Any]]) -> None:
+    print(f"{'Kernel':<24} {'min':>9} {'median':>9} {'mean':>9} {'std':>9}   [ns/call]")
+    for r in results:
+        print(f"{r['kernel']:<24} {r['min_ns']:9.1f} {r['median_ns']:9.1f} {r['mean_ns']:9.1f} {r['std_ns']:9.1f}")
+
+
+def write_json(path: str, results: List[Dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+
+
+# One row per kernel, the machine columns are repeated so CSV files of many hosts can be concatenated
+def write_csv(path: str, results: List[Dict[str, Any]]) -> None:
+    machine = machine_info()
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[*machine, *(results[0] if results else {})])
+        writer.writeheader()
+        for r in results:
+            writer.writerow({**machine, **r})
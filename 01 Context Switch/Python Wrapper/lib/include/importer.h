@@ -0,0 +1,18 @@
+#ifndef IMPORTER_H
+#define IMPORTER_H
+
+#include <pybind11/pybind11.h>
+
+/**
+ * Extra for m.def(): releases the GIL while the bound C++ function runs,
+ * so several Python threads can execute it at the same time.
+ * Importer.cpp(path, release_gil=False) turns it into a no-op.
+ * Only use it for functions that do not touch Python objects.
+ */
+#if IMPORTER_RELEASE_GIL
+#define IMPORTER_NOGIL pybind11::call_guard<pybind11::gil_scoped_release>()
+#else
+#define IMPORTER_NOGIL pybind11::call_guard<>()
+#endif
+
+#endif
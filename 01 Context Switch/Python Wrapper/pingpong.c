@@ -0,0 +1,207 @@
+#define _GNU_SOURCE
+#include <time.h>
+#include <sched.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <signal.h>
+#include <sys/mman.h>
+#include <sys/wait.h>
+#include <sys/eventfd.h>
+#include <sys/syscall.h>
+#include <linux/futex.h>
+
+// Real context switches: two threads or two processes pass a token back and forth,
+// every hand-over blocks one side and wakes the other (see lib/PingPong.py)
+
+#define MODE_THREAD 0
+#define MODE_PROCESS 1
+
+#define CHANNEL_FUTEX 0
+#define CHANNEL_EVENTFD 1
+#define CHANNEL_PIPE 2
+
+struct channel {
+    int kind;
+    // Futex words live in shared memory, so they work across fork() as well
+    uint32_t *to_pong;
+    uint32_t *to_ping;
+    int fd_to_pong[2];
+    int fd_to_ping[2];
+};
+
+struct partner_args {
+    struct channel *ch;
+    int cpu;
+    long rounds;
+};
+
+static int64_t now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC_RAW, &ts);
+    return (int64_t)ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
+static void pin(int cpu) {
+    if (cpu < 0) {
+        return;
+    }
+    cpu_set_t set;
+    CPU_ZERO(&set);
+    CPU_SET(cpu, &set);
+    sched_setaffinity(0, sizeof(set), &set);
+}
+
+// Shared (not private) futex ops, the words may be shared between processes
+static void futex_signal(uint32_t *word) {
+    __atomic_store_n(word, 1, __ATOMIC_RELEASE);
+    syscall(SYS_futex, word, FUTEX_WAKE, 1, NULL, NULL, 0);
+}
+
+static void futex_await(uint32_t *word) {
+    while (__atomic_load_n(word, __ATOMIC_ACQUIRE) == 0) {
+        syscall(SYS_futex, word, FUTEX_WAIT, 0, NULL, NULL, 0);
+    }
+    __atomic_store_n(word, 0, __ATOMIC_RELAXED);
+}
+
+static int fd_signal(int fd, int kind) {
+    uint64_t one = 1;
+    // eventfd needs 8 byte writes, a pipe transports a single byte
+    size_t len = kind == CHANNEL_EVENTFD ? sizeof(one) : 1;
+    return write(fd, &one, len) == (ssize_t)len ? 0 : -1;
+}
+
+static int fd_await(int fd, int kind) {
+    uint64_t value = 0;
+    size_t len = kind == CHANNEL_EVENTFD ? sizeof(value) : 1;
+    return read(fd, &value, len) == (ssize_t)len ? 0 : -1;
+}
+
+static int send_to_pong(struct channel *ch) {
+    if (ch->kind == CHANNEL_FUTEX) {
+        futex_signal(ch->to_pong);
+        return 0;
+    }
+    return fd_signal(ch->fd_to_pong[1], ch->kind);
+}
+
+static int await_pong(struct channel *ch) {
+    if (ch->kind == CHANNEL_FUTEX) {
+        futex_await(ch->to_ping);
+        return 0;
+    }
+    return fd_await(ch->fd_to_ping[0], ch->kind);
+}
+
+static void *partner(void *arg) {
+    struct partner_args *a = arg;
+    struct channel *ch = a->ch;
+    pin(a->cpu);
+    for (long i = 0; i < a->rounds; i++) {
+        if (ch->kind == CHANNEL_FUTEX) {
+            futex_await(ch->to_pong);
+            futex_signal(ch->to_ping);
+        } else if (fd_await(ch->fd_to_pong[0], ch->kind) != 0 || fd_signal(ch->fd_to_ping[1], ch->kind) != 0) {
+            break;
+        }
+    }
+    return NULL;
+}
+
+static int open_channel(struct channel *ch, int kind) {
+    ch->kind = kind;
+    ch->to_pong = mmap(NULL, 2 * sizeof(uint32_t), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0);
+    if (ch->to_pong == MAP_FAILED) {
+        return -1;
+    }
+    ch->to_ping = ch->to_pong + 1;
+    *ch->to_pong = 0;
+    *ch->to_ping = 0;
+    if (kind == CHANNEL_EVENTFD) {
+        ch->fd_to_pong[0] = ch->fd_to_pong[1] = eventfd(0, 0);
+        ch->fd_to_ping[0] = ch->fd_to_ping[1] = eventfd(0, 0);
+        return ch->fd_to_pong[0] < 0 || ch->fd_to_ping[0] < 0 ? -1 : 0;
+    }
+    if (kind == CHANNEL_PIPE) {
+        return pipe(ch->fd_to_pong) != 0 || pipe(ch->fd_to_ping) != 0 ? -1 : 0;
+    }
+    return kind == CHANNEL_FUTEX ? 0 : -1;
+}
+
+static void close_channel(struct channel *ch) {
+    if (ch->kind == CHANNEL_EVENTFD) {
+        close(ch->fd_to_pong[0]);
+        close(ch->fd_to_ping[0]);
+    } else if (ch->kind == CHANNEL_PIPE) {
+        close(ch->fd_to_pong[0]);
+        close(ch->fd_to_pong[1]);
+        close(ch->fd_to_ping[0]);
+        close(ch->fd_to_ping[1]);
+    }
+    munmap(ch->to_pong, 2 * sizeof(uint32_t));
+}
+
+// Measures warmup + iterations round trips and stores the per-switch latency (round trip / 2)
+// of each timed round trip in nanoseconds into samples
+// mode: MODE_THREAD or MODE_PROCESS, channel: CHANNEL_FUTEX, CHANNEL_EVENTFD or CHANNEL_PIPE
+// cpu_ping/cpu_pong: CPU to pin each side to, -1 leaves the placement to the scheduler
+// Returns 0 on success, -1 on error; the affinity of the calling thread is restored
+int pingpong(int mode, int channel, int cpu_ping, int cpu_pong, int warmup, int iterations, int64_t *samples) {
+    struct channel ch;
+    if (open_channel(&ch, channel) != 0) {
+        return -1;
+    }
+
+    cpu_set_t saved;
+    sched_getaffinity(0, sizeof(saved), &saved);
+
+    struct partner_args args = { &ch, cpu_pong, (long)warmup + iterations };
+    pthread_t thread;
+    pid_t pid = -1;
+    if (mode == MODE_THREAD) {
+        if (pthread_create(&thread, NULL, partner, &args) != 0) {
+            close_channel(&ch);
+            return -1;
+        }
+    } else {
+        pid = fork();
+        if (pid < 0) {
+            close_channel(&ch);
+            return -1;
+        }
+        if (pid == 0) {
+            partner(&args);
+            _exit(0);
+        }
+    }
+
+    pin(cpu_ping);
+    int rc = 0;
+    for (long i = 0; i < (long)warmup + iterations; i++) {
+        int64_t start = now_ns();
+        if (send_to_pong(&ch) != 0 || await_pong(&ch) != 0) {
+            rc = -1;
+            break;
+        }
+        if (i >= warmup) {
+            samples[i - warmup] = (now_ns() - start) / 2;
+        }
+    }
+
+    if (mode == MODE_THREAD) {
+        if (rc != 0) {
+            pthread_cancel(thread);
+        }
+        pthread_join(thread, NULL);
+    } else {
+        if (rc != 0) {
+            kill(pid, SIGKILL);
+        }
+        waitpid(pid, NULL, 0);
+    }
+    sched_setaffinity(0, sizeof(saved), &saved);
+    close_channel(&ch);
+    return rc;
+}
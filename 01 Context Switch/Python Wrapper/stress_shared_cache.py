@@ -0,0 +1,48 @@
+from lib.Importer import Importer
+from pathlib import Path
+import multiprocessing as mp
+import sys
+import tempfile
+
+# Starts many processes that import cs.c and cs.cpp at the same moment into one empty shared cache
+# Every process must load a working module and each variant must be compiled exactly once
+PROCESSES = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+SRC = Path(__file__).parent / "cs"
+
+
+def worker(build_dir: str, barrier, results) -> None:
+    imp = Importer(build_dir)
+    barrier.wait()
+    try:
+        imp.c(str(SRC), typed=True)
+        imp.cpp(str(SRC))
+        results.put((True, imp.compiled))
+    except Exception as e:
+        results.put((False, [repr(e)]))
+
+
+def main() -> None:
+    ctx = mp.get_context("fork")
+    with tempfile.TemporaryDirectory() as build_dir:
+        barrier = ctx.Barrier(PROCESSES)
+        results = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(build_dir, barrier, results)) for _ in range(PROCESSES)]
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    failures = [detail for ok, detail in outcomes if not ok]
+    compiled = [name for ok, names in outcomes if ok for name in names]
+    print(f"Processes              : {PROCESSES}")
+    print(f"Failed imports         : {len(failures)}")
+    print(f"Compilations (expect 2): {len(compiled)}")
+    for detail in failures:
+        print(f"  {detail}")
+    if failures or len(compiled) != 2:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
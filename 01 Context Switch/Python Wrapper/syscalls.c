@@ -0,0 +1,92 @@
+#define _GNU_SOURCE
+#include <time.h>
+#include <fcntl.h>
+#include <sched.h>
+#include <stdint.h>
+#include <unistd.h>
+#include <sys/syscall.h>
+#include <linux/futex.h>
+
+// Kernels for the syscall cost matrix (see lib/SyscallMatrix.py)
+// Every kernel performs iterations calls and returns the elapsed time in nanoseconds
+// measured with CLOCK_MONOTONIC_RAW, or -1 if its setup failed
+
+static int64_t now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC_RAW, &ts);
+    return (int64_t)ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
+// sleep(0) returns without sleeping, but still enters the kernel (nanosleep)
+int64_t bench_sleep0(int iterations) {
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        sleep(0);
+    }
+    return now_ns() - start;
+}
+
+int64_t bench_sched_yield(int iterations) {
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        sched_yield();
+    }
+    return now_ns() - start;
+}
+
+// syscall() bypasses any caching of the pid in libc
+int64_t bench_getpid(int iterations) {
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        syscall(SYS_getpid);
+    }
+    return now_ns() - start;
+}
+
+// clock_gettime() through the vDSO does not enter the kernel at all
+int64_t bench_clock_gettime_vdso(int iterations) {
+    struct timespec ts;
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        clock_gettime(CLOCK_MONOTONIC, &ts);
+    }
+    return now_ns() - start;
+}
+
+// The same clock read forced through a real system call
+int64_t bench_clock_gettime_syscall(int iterations) {
+    struct timespec ts;
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        syscall(SYS_clock_gettime, CLOCK_MONOTONIC, &ts);
+    }
+    return now_ns() - start;
+}
+
+int64_t bench_read_dev_zero(int iterations) {
+    char buf;
+    int fd = open("/dev/zero", O_RDONLY);
+    if (fd < 0) {
+        return -1;
+    }
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        if (read(fd, &buf, 1) != 1) {
+            close(fd);
+            return -1;
+        }
+    }
+    int64_t elapsed = now_ns() - start;
+    close(fd);
+    return elapsed;
+}
+
+// FUTEX_WAKE on a futex nobody waits on: shortest path through the futex code
+int64_t bench_futex_wake(int iterations) {
+    uint32_t futex_word = 0;
+    int64_t start = now_ns();
+    for (int i = 0; i < iterations; i++) {
+        syscall(SYS_futex, &futex_word, FUTEX_WAKE_PRIVATE, 1, NULL, NULL, 0);
+    }
+    return now_ns() - start;
+}
@@ -0,0 +1,340 @@
+#include <algorithm>
+#include <chrono>
+#include <csignal>
+#include <cerrno>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <iomanip>
+#include <iostream>
+#include <memory>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include <fcntl.h>          // O_* für mq_open
+#include <mqueue.h>         // POSIX Message Queues
+#include <sched.h>          // sched_getaffinity
+#include <unistd.h>         // pipe, fork, read, write, close
+#include <linux/futex.h>    // FUTEX_WAIT, FUTEX_WAKE
+#include <sys/eventfd.h>    // eventfd
+#include <sys/mman.h>       // mmap (gemeinsamer Speicher)
+#include <sys/socket.h>     // socketpair
+#include <sys/syscall.h>    // SYS_futex
+#include <sys/wait.h>       // waitpid
+
+#include "messdatei.h"      // schreibe_binaer, schreibe_csv
+
+
+// IPC-Latenzmatrix: derselbe Ping-Pong wie in Pipe_latenz über verschiedene Mechanismen.
+// Je Mechanismus entsteht eine Messdatei im gewohnten Format (Round-Trip-Zeiten, Einweg = / 2),
+// die messwerte_analyse.py und vergleiche_messungen.py direkt lesen.
+
+// Ein Kanal in beide Richtungen; der Parent sendet Pings und wartet auf Pongs, das Kind umgekehrt
+struct Kanal {
+    virtual ~Kanal() = default;
+    virtual bool sende_ping() = 0;
+    virtual bool warte_ping() = 0;
+    virtual bool sende_pong() = 0;
+    virtual bool warte_pong() = 0;
+};
+
+
+// Dateideskriptor-basierte Mechanismen: je Richtung ein Schreib- und ein Leseende
+struct FdKanal : Kanal {
+    int ping_schreiben, ping_lesen, pong_schreiben, pong_lesen;
+    size_t laenge;                 // eventfd verlangt 8 Byte, sonst 1 Byte Nutzlast
+    std::vector<int> zu_schliessen;
+
+    FdKanal(int ps, int pl, int pos, int pol, size_t l, std::vector<int> fds)
+        : ping_schreiben(ps), ping_lesen(pl), pong_schreiben(pos), pong_lesen(pol), laenge(l),
+          zu_schliessen(std::move(fds)) {}
+    ~FdKanal() override
+    {
+        for (int fd : zu_schliessen) close(fd);
+    }
+
+    bool sende(int fd)
+    {
+        uint64_t wert = 1;
+        return write(fd, &wert, laenge) == static_cast<ssize_t>(laenge);
+    }
+    bool warte(int fd)
+    {
+        uint64_t wert = 0;
+        return read(fd, &wert, laenge) == static_cast<ssize_t>(laenge);
+    }
+    bool sende_ping() override { return sende(ping_schreiben); }
+    bool warte_ping() override { return warte(ping_lesen); }
+    bool sende_pong() override { return sende(pong_schreiben); }
+    bool warte_pong() override { return warte(pong_lesen); }
+};
+
+
+struct MqKanal : Kanal {
+    mqd_t ping, pong;
+
+    MqKanal(mqd_t pi, mqd_t po) : ping(pi), pong(po) {}
+    ~MqKanal() override
+    {
+        mq_close(ping);
+        mq_close(pong);
+    }
+
+    bool sende_ping() override { return mq_send(ping, "X", 1, 0) == 0; }
+    bool sende_pong() override { return mq_send(pong, "X", 1, 0) == 0; }
+    bool warte_ping() override
+    {
+        char buf[8];
+        return mq_receive(ping, buf, sizeof(buf), nullptr) == 1;
+    }
+    bool warte_pong() override
+    {
+        char buf[8];
+        return mq_receive(pong, buf, sizeof(buf), nullptr) == 1;
+    }
+};
+
+
+// Zwei Wörter in gemeinsamem Speicher; warten per futex() oder durch aktives Abfragen
+struct ShmKanal : Kanal {
+    uint32_t* worte;
+    bool busy_poll;
+
+    ShmKanal(uint32_t* w, bool poll) : worte(w), busy_poll(poll) {}
+    ~ShmKanal() override { munmap(worte, 2 * sizeof(uint32_t)); }
+
+    void signal(uint32_t* wort)
+    {
+        __atomic_store_n(wort, 1, __ATOMIC_RELEASE);
+        if (!busy_poll) {
+            syscall(SYS_futex, wort, FUTEX_WAKE, 1, nullptr, nullptr, 0);
+        }
+    }
+    void warte(uint32_t* wort)
+    {
+        while (__atomic_load_n(wort, __ATOMIC_ACQUIRE) == 0) {
+            if (!busy_poll) {
+                syscall(SYS_futex, wort, FUTEX_WAIT, 0, nullptr, nullptr, 0);
+            }
+#if defined(__x86_64__) || defined(__i386__)
+            else {
+                __builtin_ia32_pause();
+            }
+#endif
+        }
+        __atomic_store_n(wort, 0, __ATOMIC_RELAXED);
+    }
+    bool sende_ping() override { signal(&worte[0]); return true; }
+    bool warte_ping() override { warte(&worte[0]); return true; }
+    bool sende_pong() override { signal(&worte[1]); return true; }
+    bool warte_pong() override { warte(&worte[1]); return true; }
+};
+
+
+const std::vector<std::string> MECHANISMEN = {
+    "pipe", "unix_stream", "unix_dgram", "eventfd", "mqueue", "shm_futex", "shm_spin",
+};
+
+
+// Scheitert der zweite Teil eines Kanals, wird der bereits geöffnete erste wieder geschlossen
+static std::unique_ptr<Kanal> oeffne(const std::string& name)
+{
+    if (name == "pipe") {
+        int a[2], b[2];
+        if (pipe(a) != 0) return nullptr;
+        if (pipe(b) != 0) {
+            close(a[0]);
+            close(a[1]);
+            return nullptr;
+        }
+        return std::make_unique<FdKanal>(a[1], a[0], b[1], b[0], 1, std::vector<int>{a[0], a[1], b[0], b[1]});
+    }
+    if (name == "unix_stream" || name == "unix_dgram") {
+        int sv[2];
+        int typ = name == "unix_stream" ? SOCK_STREAM : SOCK_DGRAM;
+        if (socketpair(AF_UNIX, typ, 0, sv) != 0) return nullptr;
+        // Parent benutzt sv[0], das Kind sv[1]
+        return std::make_unique<FdKanal>(sv[0], sv[1], sv[1], sv[0], 1, std::vector<int>{sv[0], sv[1]});
+    }
+    if (name == "eventfd") {
+        int ping = eventfd(0, 0);
+        if (ping < 0) return nullptr;
+        int pong = eventfd(0, 0);
+        if (pong < 0) {
+            close(ping);
+            return nullptr;
+        }
+        return std::make_unique<FdKanal>(ping, ping, pong, pong, sizeof(uint64_t), std::vector<int>{ping, pong});
+    }
+    if (name == "mqueue") {
+        mq_attr attr{};
+        attr.mq_maxmsg = 1;
+        attr.mq_msgsize = 8;
+        std::string basis = "/ipc_latenz_" + std::to_string(getpid());
+        mqd_t ping = mq_open((basis + "_ping").c_str(), O_RDWR | O_CREAT | O_EXCL, 0600, &attr);
+        mqd_t pong = mq_open((basis + "_pong").c_str(), O_RDWR | O_CREAT | O_EXCL, 0600, &attr);
+        // Die Namen werden nicht mehr gebraucht, die offenen Deskriptoren erben sich per fork()
+        mq_unlink((basis + "_ping").c_str());
+        mq_unlink((basis + "_pong").c_str());
+        if (ping == (mqd_t)-1 || pong == (mqd_t)-1) {
+            if (ping != (mqd_t)-1) mq_close(ping);
+            if (pong != (mqd_t)-1) mq_close(pong);
+            return nullptr;
+        }
+        return std::make_unique<MqKanal>(ping, pong);
+    }
+    if (name == "shm_futex" || name == "shm_spin") {
+        void* p = mmap(nullptr, 2 * sizeof(uint32_t), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0);
+        if (p == MAP_FAILED) return nullptr;
+        auto* worte = static_cast<uint32_t*>(p);
+        worte[0] = worte[1] = 0;
+        return std::make_unique<ShmKanal>(worte, name == "shm_spin");
+    }
+    return nullptr;
+}
+
+
+// Misst warmup + anzahl Round-Trips; das Kind antwortet genau so oft und beendet sich dann
+static bool messe(Kanal& kanal, long warmup, long anzahl, std::vector<int64_t>& messwerte)
+{
+    using clock = std::chrono::steady_clock;
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        perror("fork");
+        return false;
+    }
+    if (pid == 0) {
+        for (long i = 0; i < warmup + anzahl; ++i) {
+            if (!kanal.warte_ping() || !kanal.sende_pong()) break;
+        }
+        _exit(0);
+    }
+
+    bool ok = true;
+    messwerte.clear();
+    messwerte.reserve(anzahl);
+    for (long i = 0; i < warmup + anzahl; ++i) {
+        auto t0 = clock::now();
+        if (!kanal.sende_ping() || !kanal.warte_pong()) {
+            perror("ping-pong");
+            ok = false;
+            break;
+        }
+        auto t1 = clock::now();
+        if (i >= warmup) {
+            messwerte.push_back(std::chrono::duration_cast<std::chrono::nanoseconds>(t1 - t0).count());
+        }
+    }
+    if (!ok) kill(pid, SIGKILL);
+    waitpid(pid, nullptr, 0);
+    return ok;
+}
+
+
+static void zeige_aufruf(const char* programm)
+{
+    std::cerr << "Aufruf: " << programm << " [Anzahl] [--binaer] [--mechanismen a,b,...] [--ausgabe Verzeichnis]\n"
+              << "Mechanismen:";
+    for (const std::string& name : MECHANISMEN) std::cerr << " " << name;
+    std::cerr << "\n";
+}
+
+
+int main(int argc, char* argv[])
+{
+    // -------- Parameter --------
+    // ./IPC_latenz [Anzahl] [--binaer] [--mechanismen pipe,eventfd,...] [--ausgabe Verzeichnis]
+    // Schreibt je Mechanismus Verzeichnis/ipc_<mechanismus>.{csv,bin} (Standard results/ipc)
+    long anzahl = 200000;
+    bool binaer = false;
+    std::string verzeichnis = "results/ipc";
+    std::vector<std::string> mechanismen = MECHANISMEN;
+
+    for (int i = 1; i < argc; ++i) {
+        bool hat_wert = i + 1 < argc;
+        if (std::strcmp(argv[i], "--binaer") == 0) {
+            binaer = true;
+        } else if (std::strcmp(argv[i], "--ausgabe") == 0 && hat_wert) {
+            verzeichnis = argv[++i];
+        } else if (std::strcmp(argv[i], "--mechanismen") == 0 && hat_wert) {
+            mechanismen.clear();
+            std::stringstream liste(argv[++i]);
+            for (std::string name; std::getline(liste, name, ',');) {
+                if (std::find(MECHANISMEN.begin(), MECHANISMEN.end(), name) == MECHANISMEN.end()) {
+                    std::cerr << "Unbekannter Mechanismus: " << name << "\n";
+                    zeige_aufruf(argv[0]);
+                    return 1;
+                }
+                mechanismen.push_back(name);
+            }
+            if (mechanismen.empty()) {
+                std::cerr << "--mechanismen braucht mindestens einen Namen\n";
+                zeige_aufruf(argv[0]);
+                return 1;
+            }
+        } else {
+            // Nur eine positive Zahl ist noch erlaubt; unbekannte Optionen nicht als Anzahl lesen
+            char* ende = nullptr;
+            errno = 0;
+            long wert = std::strtol(argv[i], &ende, 10);
+            if (argv[i][0] == '-' || *ende != '\0' || ende == argv[i] || errno != 0 || wert <= 0) {
+                std::cerr << "Unbekannter Parameter: " << argv[i] << "\n";
+                zeige_aufruf(argv[0]);
+                return 1;
+            }
+            anzahl = wert;
+        }
+    }
+    long warmup = std::min(1000L, anzahl / 10);
+
+    // Aktives Warten braucht einen zweiten Kern, sonst dreht jede Seite bis zum Ende ihrer Zeitscheibe
+    cpu_set_t cpus;
+    sched_getaffinity(0, sizeof(cpus), &cpus);
+    bool mehrere_cpus = CPU_COUNT(&cpus) > 1;
+
+    if (!erstelle_verzeichnisse(verzeichnis)) {
+        return 1;
+    }
+
+    std::cout << std::left << std::setw(14) << "Mechanismus" << std::right << std::setw(13) << "Median [ns]"
+              << std::setw(13) << "Mittel [ns]" << "  (Einweg, " << anzahl << " Messwerte)\n";
+    std::vector<int64_t> messwerte;
+    for (const std::string& name : mechanismen) {
+        if (name == "shm_spin" && !mehrere_cpus) {
+            std::cout << name << ": uebersprungen, braucht mindestens 2 CPUs\n";
+            continue;
+        }
+        std::unique_ptr<Kanal> kanal = oeffne(name);
+        if (!kanal) {
+            perror(name.c_str());
+            continue;
+        }
+        if (!messe(*kanal, warmup, anzahl, messwerte) || messwerte.empty()) {
+            std::cerr << name << ": Messung fehlgeschlagen\n";
+            continue;
+        }
+
+        std::string pfad = verzeichnis + "/ipc_" + name + (binaer ? ".bin" : ".csv");
+        bool geschrieben = binaer ? schreibe_binaer(pfad.c_str(), messwerte, warmup)
+                                  : schreibe_csv(pfad.c_str(), messwerte);
+        if (!geschrieben) {
+            std::cerr << "Fehler beim Schreiben von " << pfad << "\n";
+        }
+
+        double summe = 0.0;
+        for (int64_t wert : messwerte) summe += wert;
+        std::vector<int64_t> kopie = messwerte;
+        std::nth_element(kopie.begin(), kopie.begin() + kopie.size() / 2, kopie.end());
+        // Eigener Stream für die Zeile, damit std::fixed nicht an std::cout hängen bleibt
+        std::ostringstream zeile;
+        zeile << std::left << std::setw(14) << name << std::right << std::fixed << std::setprecision(1)
+              << std::setw(13) << kopie[kopie.size() / 2] / 2.0
+              << std::setw(13) << summe / messwerte.size() / 2.0 << "  -> " << pfad << "\n";
+        std::cout << zeile.str();
+    }
+
+    std::cout << "\nVergleich: python3 vergleiche_messungen.py '" << verzeichnis << "/ipc_*'\n";
+    return 0;
+}
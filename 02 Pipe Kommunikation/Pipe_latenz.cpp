@@ -1,30 +1,230 @@
+#include <algorithm>
 #include <chrono>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
 #include <fstream>
 #include <iostream>
+#include <string>
 #include <vector>
 
+#include <fcntl.h>       // open, fcntl(F_SETPIPE_SZ), splice, vmsplice
 #include <unistd.h>      // pipe, fork, read, write, close
 #include <sys/types.h>   // pid_t
+#include <sys/uio.h>     // iovec
 #include <sys/wait.h>    // waitpid
-#include <sys/stat.h>    // mkdir
+
+#include "messdatei.h"   // BinKopf, schreibe_binaer, schreibe_csv
+
+
+// Überträgt genau n Bytes; write()/read() dürfen bei großen Nachrichten in Teilen arbeiten
+static bool schreibe_alles(int fd, const char* daten, size_t n)
+{
+    while (n > 0) {
+        ssize_t w = write(fd, daten, n);
+        if (w <= 0) return false;
+        daten += w;
+        n -= static_cast<size_t>(w);
+    }
+    return true;
+}
+
+
+static bool lies_alles(int fd, char* daten, size_t n)
+{
+    while (n > 0) {
+        ssize_t r = read(fd, daten, n);
+        if (r <= 0) return false;
+        daten += r;
+        n -= static_cast<size_t>(r);
+    }
+    return true;
+}
+
+
+// Zero-Copy-Variante: vmsplice() hängt die Seiten des Puffers in die Pipe ein, statt sie
+// zu kopieren; der Puffer wird danach nie verändert
+static bool vmsplice_alles(int fd, const char* daten, size_t n)
+{
+    while (n > 0) {
+        iovec iov{const_cast<char*>(daten), n};
+        ssize_t w = vmsplice(fd, &iov, 1, 0);
+        if (w <= 0) return false;
+        daten += w;
+        n -= static_cast<size_t>(w);
+    }
+    return true;
+}
+
+
+// Empfängt per splice() nach /dev/null, die Nutzlast wird nie in den Userspace kopiert
+static bool splice_alles(int fd, int devnull, size_t n)
+{
+    while (n > 0) {
+        ssize_t r = splice(fd, nullptr, devnull, nullptr, n, SPLICE_F_MOVE);
+        if (r <= 0) return false;
+        n -= static_cast<size_t>(r);
+    }
+    return true;
+}
+
+
+// 95%-Konfidenzintervall des Medians über Ordnungsstatistiken (verteilungsfrei,
+// Normalapproximation der Binomialverteilung). Arbeitet auf dem wiederverwendeten
+// Puffer kopie, die Messwerte selbst bleiben unverändert. false ohne Messwerte.
+static bool median_ki(const std::vector<int64_t>& werte, std::vector<int64_t>& kopie,
+                      double& median, double& unten, double& oben)
+{
+    if (werte.empty()) return false;
+    kopie.assign(werte.begin(), werte.end());
+
+    const double n = static_cast<double>(kopie.size());
+    const double halb = 1.959964 * std::sqrt(n) / 2.0;
+    size_t lo = static_cast<size_t>(std::max(0.0, std::floor(n / 2.0 - halb)));
+    size_t hi = static_cast<size_t>(std::min(n - 1.0, std::ceil(n / 2.0 + halb)));
+    size_t mitte = kopie.size() / 2;
+
+    // Werte sind Round-Trips, das Ergebnis ist Einweg (Hälfte)
+    std::nth_element(kopie.begin(), kopie.begin() + mitte, kopie.end());
+    median = kopie[mitte] / 2.0;
+    std::nth_element(kopie.begin(), kopie.begin() + lo, kopie.begin() + mitte);
+    unten = kopie[lo] / 2.0;
+    std::nth_element(kopie.begin() + mitte, kopie.begin() + hi, kopie.end());
+    oben = kopie[hi] / 2.0;
+    return true;
+}
+
+
+// Liest eine Zahl > 0; false bei Text, Resten hinter der Zahl oder Werten <= 0
+static bool lies_positiv(const std::string& text, long& wert)
+{
+    size_t ende = 0;
+    try {
+        wert = std::stol(text, &ende);
+    } catch (...) {
+        return false;
+    }
+    return ende == text.size() && wert > 0;
+}
+
+
+static bool lies_positiv(const std::string& text, double& wert)
+{
+    size_t ende = 0;
+    try {
+        wert = std::stod(text, &ende);
+    } catch (...) {
+        return false;
+    }
+    return ende == text.size() && wert > 0.0 && std::isfinite(wert);
+}
+
+
+static void zeige_aufruf(const char* programm)
+{
+    std::cerr << "Aufruf: " << programm << " [Anzahl | --adaptiv [Praezision] [Budget_s]]"
+              << " [--binaer] [--live] [--groesse N] [--pipe-groesse N] [--splice] [--durchsatz]"
+              << " [--ausgabe PFAD]\n"
+              << "Anzahl, Praezision, Budget_s und N muessen groesser als 0 sein.\n";
+}
 
 
 int main(int argc, char* argv[])
 {
-    // -------- Parameter: Anzahl der Messwerte --------
+    // -------- Parameter --------
+    // ./Pipe_latenz [Anzahl]                          feste Anzahl Messwerte
+    // ./Pipe_latenz --adaptiv [Praezision] [Budget_s]  misst in Batches, bis die halbe Breite
+    //     des 95%-KI des Medians <= Praezision * Median ist (Standard 0.01)
+    //     oder das Zeitbudget (Standard 60 s) erschöpft ist
+    // zusätzlich --binaer: results/pipe_latenz.bin (int64, siehe BinKopf) statt CSV
+    //           --live:   Messwerte nach jedem Batch anhängen (für messwerte_analyse.py --follow)
+    //           --groesse N:       Nutzlast je Nachricht in Byte (Standard 1)
+    //           --pipe-groesse N:  Pipe-Kapazität per fcntl(F_SETPIPE_SZ) setzen
+    //           --splice:          Senden per vmsplice(), Empfangen per splice() nach /dev/null
+    //           --durchsatz:       Strom nur in eine Richtung statt Ping-Pong; Messwert (Einweg)
+    //                              ist die Zeit je Nachricht, zusätzlich wird Byte/s ausgegeben
+    //           --ausgabe PFAD:    Ausgabedatei statt results/pipe_latenz.{csv,bin}
     long iterations = 200000;     // Standard: 200k Messungen
+    bool adaptiv = false;
+    bool binaer = false;
+    bool live = false;
+    bool zero_copy = false;
+    bool durchsatz = false;
+    size_t groesse = 1;
+    long pipe_groesse = 0;
+    std::string ausgabe_pfad;
+    double praezision = 0.01;
+    double budget_s = 60.0;
+    const long batch = 10000;
 
-    if (argc > 1) {
-        try {
-            iterations = std::stol(argv[1]);
-        } catch (...) {
-            std::cerr << "Ungueltiger Parameter, verwende Standard: "
-                      << iterations << "\n";
+    // Unbekannte Optionen und fehlende oder ungültige Werte brechen ab, statt still mit
+    // Standardwerten zu messen (der Sweep würde die Messung sonst falsch benennen)
+    std::vector<std::string> args;
+    for (int i = 1; i < argc; ++i) {
+        bool hat_wert = i + 1 < argc;
+        long wert = 0;
+        if (std::strcmp(argv[i], "--binaer") == 0) {
+            binaer = true;
+        } else if (std::strcmp(argv[i], "--live") == 0) {
+            live = true;
+        } else if (std::strcmp(argv[i], "--splice") == 0) {
+            zero_copy = true;
+        } else if (std::strcmp(argv[i], "--durchsatz") == 0) {
+            durchsatz = true;
+        } else if (std::strcmp(argv[i], "--groesse") == 0 || std::strcmp(argv[i], "--pipe-groesse") == 0) {
+            if (!hat_wert || !lies_positiv(argv[i + 1], wert)) {
+                std::cerr << argv[i] << " braucht eine Zahl > 0\n";
+                zeige_aufruf(argv[0]);
+                return 1;
+            }
+            if (std::strcmp(argv[i], "--groesse") == 0) {
+                groesse = static_cast<size_t>(wert);
+            } else {
+                pipe_groesse = wert;
+            }
+            ++i;
+        } else if (std::strcmp(argv[i], "--ausgabe") == 0) {
+            if (!hat_wert) {
+                std::cerr << "--ausgabe braucht einen Pfad\n";
+                zeige_aufruf(argv[0]);
+                return 1;
+            }
+            ausgabe_pfad = argv[++i];
+        } else if (std::strncmp(argv[i], "--", 2) == 0 && std::strcmp(argv[i], "--adaptiv") != 0) {
+            std::cerr << "Unbekannte Option: " << argv[i] << "\n";
+            zeige_aufruf(argv[0]);
+            return 1;
+        } else {
+            args.push_back(argv[i]);
         }
     }
 
+    // Anzahl bzw. Präzision und Budget werden geprüft, bevor die Ausgabedatei geöffnet
+    // (und damit eine frühere Messung überschrieben) wird
+    bool gueltig = true;
+    if (!args.empty() && args[0] == "--adaptiv") {
+        adaptiv = true;
+        if (args.size() > 1) gueltig &= lies_positiv(args[1], praezision);
+        if (args.size() > 2) gueltig &= lies_positiv(args[2], budget_s);
+        gueltig &= args.size() <= 3;
+    } else if (!args.empty()) {
+        gueltig = args.size() == 1 && lies_positiv(args[0], iterations);
+    }
+    if (!gueltig) {
+        std::cerr << "Ungueltige Parameter:";
+        for (const std::string& a : args) std::cerr << " " << a;
+        std::cerr << "\n";
+        zeige_aufruf(argv[0]);
+        return 1;
+    }
+    if (ausgabe_pfad.empty()) {
+        ausgabe_pfad = binaer ? "results/pipe_latenz.bin" : "results/pipe_latenz.csv";
+    }
+    const char* ausgabe = ausgabe_pfad.c_str();
+
     // Warmup: erste Messungen zum „Einpendeln“ des Systems
-    long warmup = std::min(1000L, iterations / 10);
+    long warmup = adaptiv ? 1000L : std::min(1000L, iterations / 10);
 
     // -------- Pipes anlegen --------
     int parent_to_child[2];
@@ -38,6 +238,36 @@ int main(int argc, char* argv[])
         perror("pipe child_to_parent");
         return 1;
     }
+    if (pipe_groesse > 0) {
+        for (int fd : {parent_to_child[1], child_to_parent[1]}) {
+            if (fcntl(fd, F_SETPIPE_SZ, static_cast<int>(pipe_groesse)) < 0) {
+                perror("fcntl F_SETPIPE_SZ");
+                return 1;
+            }
+        }
+        std::cout << "Pipe-Kapazitaet: " << fcntl(parent_to_child[1], F_GETPIPE_SZ) << " Byte\n";
+    }
+
+    int devnull = -1;
+    if (zero_copy) {
+        devnull = open("/dev/null", O_WRONLY);
+        if (devnull < 0) {
+            perror("open /dev/null");
+            return 1;
+        }
+    }
+
+    // Nutzlast; wird nie verändert, damit vmsplice() die Seiten gefahrlos einhängen kann
+    std::vector<char> nutzlast(groesse, 'X');
+    std::vector<char> empfang(groesse);
+    auto sende = [&](int fd) {
+        return zero_copy ? vmsplice_alles(fd, nutzlast.data(), groesse)
+                         : schreibe_alles(fd, nutzlast.data(), groesse);
+    };
+    auto empfange = [&](int fd) {
+        return zero_copy ? splice_alles(fd, devnull, groesse)
+                         : lies_alles(fd, empfang.data(), groesse);
+    };
 
     // -------- fork: Parent / Child --------
     pid_t pid = fork();
@@ -46,7 +276,7 @@ int main(int argc, char* argv[])
         return 1;
     }
 
-    const char ping = 'X';
+    const char ack = 'A';
     char buf;
 
     using clock = std::chrono::steady_clock;      // monotone Uhr!
@@ -57,19 +287,17 @@ int main(int argc, char* argv[])
         close(parent_to_child[1]);   // Kind liest nur
         close(child_to_parent[0]);   // Kind schreibt nur
 
-        long total = warmup + iterations;
-        for (long i = 0; i < total; ++i) {
-            ssize_t r = read(parent_to_child[0], &buf, 1);
-            if (r != 1) {
-                if (r < 0) perror("child read");
-                break;
-            }
-            ssize_t w = write(child_to_parent[1], &buf, 1);
-            if (w != 1) {
-                if (w < 0) perror("child write");
+        // Antwortet, bis der Parent seine Pipe schließt (EOF), die Anzahl ist im adaptiven Modus offen;
+        // im Durchsatzmodus wird nur gelesen und am Ende einmal quittiert
+        while (empfange(parent_to_child[0])) {
+            if (!durchsatz && !sende(child_to_parent[1])) {
+                perror("child write");
                 break;
             }
         }
+        if (durchsatz && write(child_to_parent[1], &ack, 1) != 1) {
+            perror("child ack");
+        }
 
         close(parent_to_child[0]);
         close(child_to_parent[1]);
@@ -80,59 +308,163 @@ int main(int argc, char* argv[])
     close(parent_to_child[0]);   // Parent schreibt nur
     close(child_to_parent[1]);   // Parent liest nur
 
-    // results/ anlegen (falls nicht vorhanden)
-    mkdir("results", 0777);
+    // Verzeichnis der Ausgabedatei samt Elternverzeichnissen anlegen (falls nicht vorhanden)
+    size_t trenner = ausgabe_pfad.rfind('/');
+    if (trenner != std::string::npos && !erstelle_verzeichnisse(ausgabe_pfad.substr(0, trenner))) {
+        return 1;
+    }
 
-    std::ofstream csv("results/pipe_latenz.csv");
-    if (!csv) {
-        std::cerr << "Konnte results/pipe_latenz.csv nicht oeffnen.\n";
+    // Datei vorab öffnen, damit ein Fehler vor der Messung auffällt; bei --live bleibt sie offen
+    std::ofstream datei(ausgabe, binaer ? std::ios::binary : std::ios::out);
+    if (!datei) {
+        std::cerr << "Konnte " << ausgabe << " nicht oeffnen.\n";
         return 1;
     }
-    csv << "latenz_ns\n";
+    if (!live) {
+        datei.close();
+    } else if (binaer) {
+        BinKopf kopf = mache_kopf(-1, warmup);
+        datei.write(reinterpret_cast<const char*>(&kopf), sizeof(kopf));
+    } else {
+        datei << "latenz_ns\n";
+    }
+    datei.flush();
 
     // -------- Warmup (ohne Zeitmessung) --------
     for (long i = 0; i < warmup; ++i) {
-        if (write(parent_to_child[1], &ping, 1) != 1) {
+        if (!sende(parent_to_child[1])) {
             perror("warmup write");
             break;
         }
-        if (read(child_to_parent[0], &buf, 1) != 1) {
+        if (!durchsatz && !empfange(child_to_parent[0])) {
             perror("warmup read");
             break;
         }
     }
 
     // -------- eigentliche Messung --------
-    for (long i = 0; i < iterations; ++i) {
-        auto t0 = clock::now();
-
-        if (write(parent_to_child[1], &ping, 1) != 1) {
-            perror("write");
-            break;
-        }
-        if (read(child_to_parent[0], &buf, 1) != 1) {
-            perror("read");
-            break;
+    // Round-Trip-Zeiten (ns) werden im Speicher gesammelt und erst nach der Messung geschrieben,
+    // bei --live zusätzlich zwischen den Batches angehängt
+    std::vector<int64_t> messwerte;
+    size_t geschrieben = 0;
+    auto haenge_an = [&]() {
+        if (binaer) {
+            datei.write(reinterpret_cast<const char*>(messwerte.data() + geschrieben),
+                        static_cast<std::streamsize>((messwerte.size() - geschrieben) * sizeof(int64_t)));
+        } else {
+            for (size_t i = geschrieben; i < messwerte.size(); ++i) {
+                schreibe_einweg(datei, messwerte[i]);
+            }
         }
+        datei.flush();
+        geschrieben = messwerte.size();
+    };
+    messwerte.reserve(adaptiv ? batch * 16 : iterations);
+    auto messe = [&](long anzahl) -> bool {
+        for (long i = 0; i < anzahl; ++i) {
+            auto t0 = clock::now();
+
+            if (!sende(parent_to_child[1])) {
+                perror("write");
+                return false;
+            }
+            if (!durchsatz && !empfange(child_to_parent[0])) {
+                perror("read");
+                return false;
+            }
+
+            auto t1 = clock::now();
 
-        auto t1 = clock::now();
+            ns diff = std::chrono::duration_cast<ns>(t1 - t0);
 
-        ns diff = std::chrono::duration_cast<ns>(t1 - t0);
+            // Sicherheit: nur positive/vernünftige Werte speichern
+            if (diff.count() <= 0) {
+                // überspringen, falls aus irgendeinem Grund 0 oder negativ
+                continue;
+            }
 
-        // Sicherheit: nur positive/vernünftige Werte speichern
-        if (diff.count() <= 0) {
-            // überspringen, falls aus irgendeinem Grund 0 oder negativ
-            continue;
+            // Round-Trip, Einweg = Hälfte; im Durchsatzmodus zählt die Zeit je Nachricht als Einweg
+            messwerte.push_back(durchsatz ? 2 * diff.count() : diff.count());
+        }
+        return true;
+    };
+
+    auto messbeginn = clock::now();
+    if (!adaptiv && !live) {
+        messe(iterations);
+    } else if (!adaptiv) {
+        for (long rest = iterations; rest > 0; rest -= batch) {
+            if (!messe(std::min(batch, rest))) break;
+            haenge_an();
+        }
+    } else {
+        auto start = clock::now();
+        double median = 0.0, unten = 0.0, oben = 0.0, halbweite_rel = 0.0;
+        std::string grund = "Praezision erreicht";
+        std::vector<int64_t> kopie;
+        // Das KI kostet O(n); geprüft wird erst, wenn die Messwerte um 10 % gewachsen sind,
+        // damit die Auswertung insgesamt linear bleibt und nicht das Zeitbudget aufbraucht
+        size_t naechste_pruefung = 0;
+        while (messe(batch)) {
+            if (live) haenge_an();
+            double vergangen = std::chrono::duration<double>(clock::now() - start).count();
+            bool budget_erschoepft = vergangen >= budget_s;
+            if (messwerte.size() < naechste_pruefung && !budget_erschoepft) continue;
+            naechste_pruefung = messwerte.size() + messwerte.size() / 10;
+
+            if (median_ki(messwerte, kopie, median, unten, oben) && median > 0.0) {
+                halbweite_rel = (oben - unten) / 2.0 / median;
+                if (halbweite_rel <= praezision) break;
+            }
+            if (budget_erschoepft) {
+                grund = "Zeitbudget erschoepft";
+                break;
+            }
         }
+        std::cout << "Adaptive Messung: " << messwerte.size() << " Messwerte benoetigt (" << grund << ")\n"
+                  << "  Median " << median << " ns, 95%-KI [" << unten << ", " << oben << "] ns, "
+                  << "halbe Breite " << halbweite_rel * 100.0 << " %\n";
+    }
 
-        double one_way_ns = diff.count() / 2.0;   // Round-Trip -> Einweg
-        csv << one_way_ns << "\n";
+    if (durchsatz) {
+        // Erst wenn das Kind alles gelesen hat, ist die Übertragung abgeschlossen
+        close(parent_to_child[1]);
+        parent_to_child[1] = -1;
+        if (read(child_to_parent[0], &buf, 1) != 1) {
+            perror("ack read");
+        }
+        double dauer_s = std::chrono::duration<double>(clock::now() - messbeginn).count();
+        double bytes = static_cast<double>(messwerte.size()) * static_cast<double>(groesse);
+        std::cout << "Durchsatz: " << bytes / dauer_s / 1e6 << " MB/s (" << messwerte.size()
+                  << " Nachrichten zu " << groesse << " Byte in " << dauer_s << " s)\n";
     }
 
-    csv.close();
+    if (live) {
+        haenge_an();
+        if (binaer) {
+            // Anzahl im Kopf nachtragen: die Messung ist abgeschlossen
+            int64_t anzahl = static_cast<int64_t>(messwerte.size());
+            datei.seekp(offsetof(BinKopf, anzahl));
+            datei.write(reinterpret_cast<const char*>(&anzahl), sizeof(anzahl));
+        }
+        datei.close();
+    } else if (binaer) {
+        if (!schreibe_binaer(ausgabe, messwerte, warmup)) {
+            std::cerr << "Fehler beim Schreiben von " << ausgabe << "\n";
+        }
+    } else {
+        if (!schreibe_csv(ausgabe, messwerte)) {
+            std::cerr << "Fehler beim Schreiben von " << ausgabe << "\n";
+        }
+    }
 
-    close(parent_to_child[1]);
+    if (parent_to_child[1] >= 0) {
+        close(parent_to_child[1]);
+    }
     close(child_to_parent[0]);
+    if (devnull >= 0) {
+        close(devnull);
+    }
 
     int status = 0;
     waitpid(pid, &status, 0);
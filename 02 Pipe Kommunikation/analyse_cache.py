@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+
+# Erhöhen, wenn sich Berechnung oder Aussehen der Plots ändern, damit alte Einträge nicht mehr passen
+CACHE_VERSION = 1
+
+# Temporäre Dateien jünger als das gehören womöglich einem gleichzeitig schreibenden Prozess
+TMP_KARENZ_S = 3600
+
+
+def standard_verzeichnis() -> str:
+    """
+    ANALYSE_CACHE_DIR, sonst $XDG_CACHE_HOME (bzw. ~/.cache)/os-experiments-analyse.
+    """
+    if os.environ.get("ANALYSE_CACHE_DIR"):
+        return os.environ["ANALYSE_CACHE_DIR"]
+    basis = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(basis, "os-experiments-analyse")
+
+
+def datei_hash(pfad: str) -> str:
+    """
+    SHA-256 über den Inhalt der Messdatei, blockweise gelesen.
+    """
+    h = hashlib.sha256()
+    with open(pfad, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class AnalyseCache:
+    """
+    Ergebnisse der Analyse (eingelesene Messwerte, Statistik, Plots), abgelegt unter einem Schlüssel
+    aus dem Inhalts-Hash der Messdatei und allen Parametern, die das Ergebnis beeinflussen.
+    Einträge werden atomar geschrieben (temporäre Datei + os.replace), ein Treffer frischt die
+    Änderungszeit auf; aufraeumen() entfernt zu alte Einträge und danach die am längsten
+    ungenutzten, bis die Gesamtgröße eingehalten ist. Ein Eintrag, der allein größer als
+    max_bytes ist, wird gar nicht erst geschrieben.
+    """
+
+    def __init__(self, verzeichnis: str | None = None, max_bytes: int = 1 << 30,
+                 max_alter_s: float = 7 * 24 * 3600) -> None:
+        self.verzeichnis = verzeichnis or standard_verzeichnis()
+        self.max_bytes = max_bytes
+        self.max_alter_s = max_alter_s
+        os.makedirs(self.verzeichnis, exist_ok=True)
+
+    def schluessel(self, daten_hash: str, art: str, **parameter) -> str:
+        teile = json.dumps([CACHE_VERSION, daten_hash, art, parameter], sort_keys=True)
+        return hashlib.sha256(teile.encode()).hexdigest()[:32]
+
+    def __pfad(self, schluessel: str, endung: str) -> str:
+        return os.path.join(self.verzeichnis, schluessel + endung)
+
+    def __treffer(self, pfad: str) -> bool:
+        try:
+            os.utime(pfad)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def __schreibe(self, ziel: str, groesse: int, schreiben) -> None:
+        if groesse > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.verzeichnis, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                schreiben(f)
+            os.replace(tmp, ziel)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def lade_array(self, schluessel: str) -> np.ndarray | None:
+        pfad = self.__pfad(schluessel, ".npy")
+        if not self.__treffer(pfad):
+            return None
+        return np.load(pfad, mmap_mode="r")
+
+    def speichere_array(self, schluessel: str, werte: np.ndarray) -> None:
+        self.__schreibe(self.__pfad(schluessel, ".npy"), werte.nbytes, lambda f: np.save(f, werte))
+
+    def lade_json(self, schluessel: str) -> dict | None:
+        pfad = self.__pfad(schluessel, ".json")
+        if not self.__treffer(pfad):
+            return None
+        with open(pfad) as f:
+            return json.load(f)
+
+    def speichere_json(self, schluessel: str, inhalt: dict) -> None:
+        daten = json.dumps(inhalt).encode()
+        self.__schreibe(self.__pfad(schluessel, ".json"), len(daten), lambda f: f.write(daten))
+
+    def lade_datei(self, schluessel: str, ziel: str) -> bool:
+        """
+        Kopiert eine zwischengespeicherte Datei (z. B. einen Plot) nach ziel, falls vorhanden.
+        """
+        pfad = self.__pfad(schluessel, os.path.splitext(ziel)[1])
+        if not self.__treffer(pfad):
+            return False
+        shutil.copyfile(pfad, ziel)
+        return True
+
+    def speichere_datei(self, schluessel: str, quelle: str) -> None:
+        with open(quelle, "rb") as q:
+            self.__schreibe(self.__pfad(schluessel, os.path.splitext(quelle)[1]), os.fstat(q.fileno()).st_size,
+                            lambda f: shutil.copyfileobj(q, f))
+
+    def aufraeumen(self) -> int:
+        """
+        Entfernt Einträge älter als max_alter_s, danach die ältesten, bis höchstens max_bytes
+        belegt sind. Temporäre Dateien werden erst nach TMP_KARENZ_S entfernt, vorher könnte
+        noch ein anderer Prozess hineinschreiben. Gibt die Anzahl entfernter Dateien zurück.
+        """
+        jetzt = time.time()
+        eintraege = []
+        entfernt = 0
+        for eintrag in os.scandir(self.verzeichnis):
+            if not eintrag.is_file():
+                continue
+            st = eintrag.stat()
+            if eintrag.name.startswith(".tmp-"):
+                if jetzt - st.st_mtime > TMP_KARENZ_S:
+                    try:
+                        os.unlink(eintrag.path)
+                        entfernt += 1
+                    except FileNotFoundError:
+                        pass
+                continue
+            eintraege.append((st.st_mtime, st.st_size, eintrag.path))
+        eintraege.sort()
+
+        gesamt = sum(groesse for _, groesse, _ in eintraege)
+        for mtime, groesse, pfad in eintraege:
+            if jetzt - mtime <= self.max_alter_s and gesamt <= self.max_bytes:
+                break
+            try:
+                os.unlink(pfad)
+            except FileNotFoundError:
+                pass
+            gesamt -= groesse
+            entfernt += 1
+        return entfernt
@@ -0,0 +1,63 @@
+import sys
+import math
+import time
+
+import numpy as np
+
+from messwerte_analyse import ACF_DIREKT_FAKTOR, autokorrelation, partielle_autokorrelation
+
+
+# Vergleicht autokorrelation() (direkt oder FFT, je nach Kosten) mit der früheren Schleife über np.correlate
+# Aufruf: python3 bench_autokorrelation.py [max_lag]
+MAX_LAG = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+GROESSEN = (10_000, 100_000, 1_000_000)
+
+
+def autokorrelation_schleife(daten: np.ndarray, max_lag: int) -> np.ndarray:
+    daten_norm = (daten - np.mean(daten)) / np.std(daten)
+    autocorr = []
+    for lag in range(1, max_lag):
+        v1 = daten_norm[:-lag]
+        v2 = daten_norm[lag:]
+        autocorr.append(np.correlate(v1, v2)[0] / len(v1))
+    return np.array(autocorr)
+
+
+def zeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rng = np.random.default_rng(1)
+    print(f"Lags 1..{MAX_LAG - 1}")
+    # Die Schleife kostet O(n * max_lag); für alle Lags bis n/2 wird ihre Zeit hochgerechnet
+    print(f"{'n':>10} {'Schleife [s]':>13} {'Verfahren':>9} {'Zeit [s]':>9} {'max. Abw.':>10} "
+          f"{'Schleife n/2 [s] (geschätzt)':>29} {'FFT n/2 [s]':>12} {'Faktor n/2':>11}")
+    for n in GROESSEN:
+        # AR(1)-Prozess, damit die Autokorrelation nicht nur Rauschen ist
+        rauschen = rng.normal(size=n)
+        daten = np.empty(n)
+        daten[0] = rauschen[0]
+        for i in range(1, n):
+            daten[i] = 0.6 * daten[i - 1] + rauschen[i]
+
+        schleife = autokorrelation_schleife(daten, MAX_LAG)
+        auswahl = autokorrelation(daten, MAX_LAG - 1)[1:]
+        t_schleife = zeit(autokorrelation_schleife, daten, MAX_LAG)
+        t_auswahl = zeit(autokorrelation, daten, MAX_LAG - 1)
+        t_alle = zeit(autokorrelation, daten)
+        abweichung = float(np.max(np.abs(schleife - auswahl)))
+        t_schleife_alle = t_schleife * (n // 2) / (MAX_LAG - 1)
+        verfahren = "direkt" if MAX_LAG - 1 < ACF_DIREKT_FAKTOR * math.log2(n) else "FFT"
+        print(f"{n:>10} {t_schleife:>13.4f} {verfahren:>9} {t_auswahl:>9.4f} {abweichung:>10.1e} "
+              f"{t_schleife_alle:>29.1f} {t_alle:>12.4f} {t_schleife_alle / t_alle:>11.0f}")
+
+    # Für einen AR(1)-Prozess ist die partielle Autokorrelation ab Lag 2 ungefähr 0
+    pacf = partielle_autokorrelation(autokorrelation(daten, 10), len(daten))
+    print(f"PACF AR(1), phi=0.6: Lag 1 = {pacf[1]:.3f}, max |Lag 2..10| = {np.max(np.abs(pacf[2:])):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# Quantile, für die Konfidenzintervalle berechnet werden
+QUANTILE = {"median": 0.5, "p95": 0.95, "p99": 0.99, "p99.9": 0.999}
+
+# Obergrenze für die Indexmatrix eines Blocks beim direkten Resampling
+SPEICHER_BYTES = 256 << 20
+
+
+def rang(q: float, n: int) -> int:
+    """
+    Rang k (1-basiert) des q-Quantils als Ordnungsstatistik x_(ceil(q n)); Punktschätzer
+    und Bootstrap verwenden denselben Schätzer.
+    """
+    return min(max(int(np.ceil(q * n)), 1), n)
+
+
+def bootstrap_beta(sortiert: np.ndarray, q: float, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Bootstrap-Verteilung des q-Quantils ohne einzelne Resamples zu ziehen.
+    Ein Resample entspricht n gleichverteilten U, abgebildet auf x_(ceil(n U)); weil die Abbildung
+    monoton ist, ist sein k-ter Wert x_(ceil(n U_(k))) mit U_(k) ~ Beta(k, n + 1 - k).
+    Exakt wie klassisches Resampling, kostet aber O(resamples) nach einmaligem Sortieren.
+    """
+    n = len(sortiert)
+    k = rang(q, n)
+    u = rng.beta(k, n + 1 - k, size=resamples)
+    index = np.clip(np.ceil(n * u).astype(np.int64), 1, n) - 1
+    return sortiert[index]
+
+
+# Messwerte für die Worker des direkten Resamplings, per fork geerbt statt gepickelt
+_daten: np.ndarray = np.empty(0)
+
+
+def _resample_block(args: tuple[int, np.random.SeedSequence, tuple[float, ...]]) -> np.ndarray:
+    anzahl, seed, qs = args
+    rng = np.random.default_rng(seed)
+    n = len(_daten)
+    k = [rang(q, n) - 1 for q in qs]
+    ergebnis = np.empty((anzahl, len(qs)))
+    # Die Indexmatrix anzahl x n ist durch die Blockgröße in bootstrap_resample begrenzt
+    index = rng.integers(0, n, size=(anzahl, n))
+    for i in range(anzahl):
+        ergebnis[i] = np.partition(_daten[index[i]], k)[k]
+    return ergebnis
+
+
+def bootstrap_resample(daten: np.ndarray, qs: tuple[float, ...], resamples: int, seed: int,
+                       prozesse: int = 1, speicher_bytes: int = SPEICHER_BYTES) -> np.ndarray:
+    """
+    Klassischer Bootstrap: zieht jedes Resample wirklich (O(n) je Resample).
+    Die Resamples werden in Blöcke mit höchstens speicher_bytes Indizes aufgeteilt und bei
+    prozesse > 1 auf einen Prozesspool verteilt. Dient als Referenz für bootstrap_beta.
+    Gibt ein Array resamples x len(qs) zurück.
+    """
+    global _daten
+    _daten = daten
+    block = max(1, speicher_bytes // (8 * len(daten)))
+    groessen = [min(block, resamples - i) for i in range(0, resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(groessen))
+    auftraege = [(g, s, qs) for g, s in zip(groessen, seeds)]
+    if prozesse > 1 and len(auftraege) > 1:
+        with ProcessPoolExecutor(max_workers=prozesse, mp_context=mp.get_context("fork")) as pool:
+            teile = list(pool.map(_resample_block, auftraege))
+    else:
+        teile = [_resample_block(a) for a in auftraege]
+    return np.concatenate(teile)
+
+
+def konfidenzintervalle(daten_ns: np.ndarray, resamples: int = 10000, niveau: float = 0.95,
+                        seed: int = 1) -> dict:
+    """
+    Perzentil-Bootstrap-Konfidenzintervalle für Median, p95, p99 und p99.9 (in µs).
+    """
+    sortiert = np.sort(np.asarray(daten_ns, dtype=float)) / 1000.0
+    rng = np.random.default_rng(seed)
+    alpha = (1.0 - niveau) / 2.0
+    ergebnis = {}
+    for name, q in QUANTILE.items():
+        verteilung = bootstrap_beta(sortiert, q, resamples, rng)
+        unten, oben = np.quantile(verteilung, [alpha, 1.0 - alpha])
+        # Derselbe Schätzer, den bootstrap_beta resampelt, sonst kann der Wert außerhalb seines Intervalls liegen
+        wert = sortiert[rang(q, len(sortiert)) - 1]
+        ergebnis[name] = {"wert": float(wert), "unten": float(unten), "oben": float(oben)}
+    return ergebnis
+
+
+def gib_intervalle_aus(ki: dict, resamples: int, niveau: float = 0.95) -> None:
+    print(f"Bootstrap-Konfidenzintervalle ({niveau:.0%}, {resamples} Resamples) [µs]")
+    for name, e in ki.items():
+        print(f"  {name:<7}: {e['wert']:10.3f}  [{e['unten']:10.3f}, {e['oben']:10.3f}]")
+
+
+def pruefe(n_gross: int, n_klein: int, resamples: int, prozesse: int) -> bool:
+    """
+    Misst die Laufzeit auf n_gross Werten und vergleicht auf n_klein Werten die Bootstrap-
+    Verteilungen mit denen des klassischen Resamplings.
+    """
+    rng = np.random.default_rng(7)
+    # Rechtsschiefe Latenzen mit seltenen, weit entfernten Ausreißern
+    ausreisser = rng.exponential(20000.0, n_gross) * (rng.random(n_gross) < 1e-3)
+    daten = rng.lognormal(np.log(2000.0), 0.3, n_gross) + ausreisser
+
+    start = time.perf_counter()
+    konfidenzintervalle(daten, resamples)
+    print(f"Beta-Bootstrap: {n_gross} Werte, {resamples} Resamples, 4 Quantile in {time.perf_counter() - start:.2f} s")
+
+    klein = daten[:n_klein] / 1000.0
+    sortiert = np.sort(klein)
+    qs = tuple(QUANTILE.values())
+    start = time.perf_counter()
+    direkt = bootstrap_resample(klein, qs, resamples, seed=3, prozesse=prozesse)
+    dauer = time.perf_counter() - start
+    print(f"Resampling:     {n_klein} Werte, {resamples} Resamples in {dauer:.2f} s ({prozesse} Prozesse)")
+
+    # Beide Verfahren sind zufällig und die Verteilungen im Tail diskret (Intervallgrenzen können
+    # zwischen zwei Ordnungsstatistiken springen): verglichen werden die ganzen Bootstrap-
+    # Verteilungen mit dem Zwei-Stichproben-Kolmogorow-Smirnow-Abstand, Schwelle für 1 %
+    schwelle = 1.63 * np.sqrt(2.0 / resamples)
+    ok = True
+    rng = np.random.default_rng(5)
+    for j, (name, q) in enumerate(QUANTILE.items()):
+        beta = bootstrap_beta(sortiert, q, resamples, rng)
+        ref = direkt[:, j]
+        stellen = np.union1d(beta, ref)
+        ks = float(np.max(np.abs(np.searchsorted(np.sort(beta), stellen, side="right")
+                                 - np.searchsorted(np.sort(ref), stellen, side="right"))) / resamples)
+        grenzen_beta = np.quantile(beta, [0.025, 0.975])
+        grenzen_ref = np.quantile(ref, [0.025, 0.975])
+        bestanden = ks <= schwelle
+        ok &= bestanden
+        print(f"  {name:<7} Beta [{grenzen_beta[0]:8.3f}, {grenzen_beta[1]:8.3f}]  "
+              f"Resampling [{grenzen_ref[0]:8.3f}, {grenzen_ref[1]:8.3f}]  "
+              f"KS {ks:.3f} (Schwelle {schwelle:.3f})  {'ok' if bestanden else 'FEHLER'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft und misst die Bootstrap-Konfidenzintervalle.")
+    parser.add_argument("-n", type=int, default=10_000_000, help="Werte für die Laufzeitmessung")
+    parser.add_argument("--n-klein", type=int, default=20_000, help="Werte für den Vergleich mit Resampling")
+    parser.add_argument("--resamples", type=int, default=10000)
+    parser.add_argument("--prozesse", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    if not pruefe(args.n, args.n_klein, args.resamples, args.prozesse):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+// Messdateiformat der Latenzmessungen (Pipe_latenz, IPC_latenz), gelesen von messwerte_analyse.py
+#pragma once
+
+#include <cerrno>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <string>
+#include <vector>
+
+#include <sys/stat.h>   // mkdir
+
+
+// Kopf der Binärdatei (64 Byte, Byteordnung des Messrechners), danach `anzahl` int64-Werte:
+// Round-Trip-Zeiten in ns (Einweg = Wert / 2). Lässt sich per np.memmap ohne Parsen laden.
+struct BinKopf {
+    char magic[8];          // "PIPELAT1"
+    uint32_t version;       // 1
+    uint32_t kopf_groesse;  // sizeof(BinKopf)
+    int64_t anzahl;         // Anzahl Messwerte, -1 solange eine --live-Messung läuft
+    int64_t warmup;         // verworfene Warmup-Messungen
+    char uhr[32];           // Zeitquelle, nullterminiert
+};
+static_assert(sizeof(BinKopf) == 64, "BinKopf muss 64 Byte gross sein");
+
+
+inline BinKopf mache_kopf(int64_t anzahl, long warmup)
+{
+    BinKopf kopf{};
+    std::memcpy(kopf.magic, "PIPELAT1", 8);
+    kopf.version = 1;
+    kopf.kopf_groesse = sizeof(BinKopf);
+    kopf.anzahl = anzahl;
+    kopf.warmup = warmup;
+    std::strncpy(kopf.uhr, "std::chrono::steady_clock", sizeof(kopf.uhr) - 1);
+    return kopf;
+}
+
+
+// Legt das Verzeichnis samt aller fehlenden Elternverzeichnisse an (wie mkdir -p)
+inline bool erstelle_verzeichnisse(const std::string& pfad)
+{
+    for (size_t pos = pfad.find('/', 1); ; pos = pfad.find('/', pos + 1)) {
+        std::string teil = pfad.substr(0, pos);
+        if (!teil.empty() && mkdir(teil.c_str(), 0777) != 0 && errno != EEXIST) {
+            perror(teil.c_str());
+            return false;
+        }
+        if (pos == std::string::npos) return true;
+    }
+}
+
+
+// Schreibt alle Messwerte mit einem einzigen write() hinter den Kopf
+inline bool schreibe_binaer(const char* pfad, const std::vector<int64_t>& round_trips, long warmup)
+{
+    BinKopf kopf = mache_kopf(static_cast<int64_t>(round_trips.size()), warmup);
+
+    std::ofstream bin(pfad, std::ios::binary);
+    if (!bin) {
+        return false;
+    }
+    bin.write(reinterpret_cast<const char*>(&kopf), sizeof(kopf));
+    bin.write(reinterpret_cast<const char*>(round_trips.data()),
+              static_cast<std::streamsize>(round_trips.size() * sizeof(int64_t)));
+    return static_cast<bool>(bin);
+}
+
+
+// Einweg-Latenz (Round-Trip / 2) als CSV-Feld: ganzzahlig, bei ungeradem Round-Trip mit ".5".
+// Exakt und ohne wissenschaftliche Notation, auch für Latenzen ab 1 ms
+inline void schreibe_einweg(std::ostream& aus, int64_t round_trip)
+{
+    aus << round_trip / 2;
+    if (round_trip % 2 != 0) {
+        aus << ".5";
+    }
+    aus << '\n';
+}
+
+
+// CSV mit einer Spalte latenz_ns: Einweg-Latenzen (Round-Trip / 2)
+inline bool schreibe_csv(const char* pfad, const std::vector<int64_t>& round_trips)
+{
+    std::ofstream csv(pfad);
+    if (!csv) {
+        return false;
+    }
+    csv << "latenz_ns\n";
+    for (int64_t wert : round_trips) {
+        schreibe_einweg(csv, wert);
+    }
+    return static_cast<bool>(csv);
+}
@@ -0,0 +1,100 @@
+import os
+import sys
+import struct
+
+import numpy as np
+import pandas as pd
+
+
+# Messdateiformat von Pipe_latenz und IPC_latenz (siehe messdatei.h): CSV mit einer Spalte
+# latenz_ns oder Binärdatei aus Kopf und int64-Round-Trip-Zeiten. Ohne Plot-Abhängigkeiten,
+# damit auch die Streaming-Statistik es importieren kann.
+
+# Kopf der Binärdatei (siehe BinKopf in messdatei.h)
+BIN_MAGIC = b"PIPELAT1"
+# Felder vor anzahl (magic, version, kopf_groesse), danach anzahl, warmup, uhr
+BIN_KOPF_VOR_ANZAHL = "<8sII"
+BIN_KOPF = struct.Struct(BIN_KOPF_VOR_ANZAHL + "qq32s")
+
+# Position des Feldes anzahl im Kopf (offsetof(BinKopf, anzahl)), das --live erst am Ende setzt
+BIN_ANZAHL_OFFSET = struct.calcsize(BIN_KOPF_VOR_ANZAHL)
+
+
+def lade_csv(pfad: str) -> np.ndarray:
+    """
+    Lädt die Messwerte aus einer CSV-Datei.
+    Erwartet eine Spalte 'latenz_ns'.
+    Gibt ein NumPy-Array in Nanosekunden zurück.
+    """
+    try:
+        df = pd.read_csv(pfad)
+        if "latenz_ns" not in df.columns:
+            raise ValueError("Spalte 'latenz_ns' nicht gefunden.")
+        return df["latenz_ns"].values.astype(float)
+    except FileNotFoundError:
+        print(f"Fehler: Datei '{pfad}' nicht gefunden.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Fehler beim Laden der Datei: {e}")
+        sys.exit(1)
+
+
+def lade_binaer(pfad: str) -> np.ndarray:
+    """
+    Lädt die Messwerte aus einer Binärdatei von Pipe_latenz --binaer.
+    Die Round-Trip-Zeiten werden per np.memmap eingeblendet, nicht geparst.
+    Gibt ein NumPy-Array der Einweg-Latenzen in Nanosekunden zurück.
+    """
+    try:
+        with open(pfad, "rb") as f:
+            kopf = f.read(BIN_KOPF.size)
+        if len(kopf) < BIN_KOPF.size:
+            raise ValueError("Datei kürzer als der Kopf.")
+        magic, version, kopf_groesse, anzahl, warmup, uhr = BIN_KOPF.unpack(kopf)
+        if magic != BIN_MAGIC or version != 1:
+            raise ValueError("Unbekanntes Binärformat.")
+        anzahl = vollstaendige_anzahl(pfad, kopf_groesse, anzahl)
+        if anzahl == 0:
+            return np.empty(0)
+        round_trips = np.memmap(pfad, dtype="<i8", mode="r", offset=kopf_groesse, shape=(anzahl,))
+        uhr = uhr.split(b"\0", 1)[0].decode()
+        print(f"Binärdatei: {anzahl} Messwerte, {warmup} Warmup, Zeitquelle {uhr}")
+        return round_trips * 0.5  # Round-Trip -> Einweg
+    except FileNotFoundError:
+        print(f"Fehler: Datei '{pfad}' nicht gefunden.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Fehler beim Laden der Datei: {e}")
+        sys.exit(1)
+
+
+def vollstaendige_anzahl(pfad: str, kopf_groesse: int, anzahl: int) -> int:
+    """
+    Anzahl der Messwerte laut Kopf. Bei einer abgebrochenen --live-Messung steht dort noch -1;
+    dann zählen alle vollständig geschriebenen Werte hinter dem Kopf.
+    """
+    if anzahl >= 0:
+        return anzahl
+    anzahl = max(os.path.getsize(pfad) - kopf_groesse, 0) // 8
+    print(f"Hinweis: {pfad} ist unvollständig (Messung abgebrochen), lese {anzahl} vorhandene Messwerte.")
+    return anzahl
+
+
+def ist_binaer(pfad: str) -> bool:
+    """
+    Erkennt Binärdateien an der Magic-Zahl, unabhängig von der Endung.
+    """
+    try:
+        with open(pfad, "rb") as f:
+            return f.read(len(BIN_MAGIC)) == BIN_MAGIC
+    except OSError:
+        return False
+
+
+def lade_messwerte(pfad: str) -> np.ndarray:
+    """
+    Lädt Binär- oder CSV-Dateien (CSV als Rückfallebene).
+    """
+    if ist_binaer(pfad):
+        return lade_binaer(pfad)
+    return lade_csv(pfad)
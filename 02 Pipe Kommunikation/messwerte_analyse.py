@@ -1,44 +1,45 @@
 import sys
 import math
 import os
+import time
+import argparse
+import collections
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from analyse_cache import AnalyseCache, datei_hash
+from bootstrap import gib_intervalle_aus, konfidenzintervalle
+from messdatei import ist_binaer, lade_messwerte
+from streaming_statistik import (GleitendesFenster, LogHistogramm, Welford, folge_datei, lies_bloecke,
+                                  streaming_statistik, zusammenfassung)
 
 
 # Sicherstellen, dass der results-Ordner existiert
 os.makedirs("results", exist_ok=True)
 
-
-def lade_csv(pfad: str) -> np.ndarray:
-    """
-    Lädt die Messwerte aus einer CSV-Datei.
-    Erwartet eine Spalte 'latenz_ns'.
-    Gibt ein NumPy-Array in Nanosekunden zurück.
-    """
-    try:
-        df = pd.read_csv(pfad)
-        if "latenz_ns" not in df.columns:
-            raise ValueError("Spalte 'latenz_ns' nicht gefunden.")
-        return df["latenz_ns"].values.astype(float)
-    except FileNotFoundError:
-        print(f"Fehler: Datei '{pfad}' nicht gefunden.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Fehler beim Laden der Datei: {e}")
-        sys.exit(1)
-
-
-def berechne_statistik(daten_ns: np.ndarray) -> None:
+def berechne_statistik(daten_ns: np.ndarray) -> dict | None:
     """
     Berechnet und gibt grundlegende statistische Größen aus.
-    Arbeitet intern in Mikrosekunden (µs).
+    Arbeitet intern in Mikrosekunden (µs); gibt die Kennzahlen zurück.
     """
     if len(daten_ns) == 0:
         print("Keine Daten vorhanden.")
-        return
+        return None
 
+    s = kennzahlen(daten_ns)
+    gib_statistik_aus(s)
+    return s
+
+
+def kennzahlen(daten_ns: np.ndarray) -> dict:
+    """
+    Kennzahlen für berechne_statistik (in µs).
+    """
     daten_us = daten_ns / 1000.0  # von ns -> µs
 
     n = len(daten_us)
@@ -59,213 +60,562 @@ def berechne_statistik(daten_ns: np.ndarray) -> None:
     ci_unten = mean - halbweite
     ci_oben = mean + halbweite
 
+    return {
+        "n": n, "min": daten_min, "max": daten_max, "mean": mean, "median": median, "std": std,
+        "p90": p90, "p95": p95, "p99": p99, "ci_unten": ci_unten, "ci_oben": ci_oben,
+    }
+
+
+def gib_statistik_aus(s: dict, titel: str = "Statistik für die Pipe-Verweildauer (Einweg) [µs]") -> None:
+    """
+    Gibt die Kennzahlen aus berechne_statistik bzw. streaming_statistik aus (Werte in µs).
+    """
     print("=" * 70)
-    print("Statistik für die Pipe-Verweildauer (Einweg) [µs]")
+    print(titel)
     print("=" * 70)
-    print(f"Anzahl Messwerte       : {n}")
-    print(f"Minimum                : {daten_min:.3f} µs")
-    print(f"Maximum                : {daten_max:.3f} µs")
-    print(f"Mittelwert             : {mean:.3f} µs")
-    print(f"Median                 : {median:.3f} µs")
-    print(f"Standardabweichung     : {std:.3f} µs")
-    print(f"90. Perzentil          : {p90:.3f} µs")
-    print(f"95. Perzentil          : {p95:.3f} µs")
-    print(f"99. Perzentil          : {p99:.3f} µs")
-    print(f"95% Konfidenzintervall : [{ci_unten:.3f}, {ci_oben:.3f}] µs")
+    print(f"Anzahl Messwerte       : {s['n']}")
+    print(f"Minimum                : {s['min']:.3f} µs")
+    print(f"Maximum                : {s['max']:.3f} µs")
+    print(f"Mittelwert             : {s['mean']:.3f} µs")
+    print(f"Median                 : {s['median']:.3f} µs")
+    print(f"Standardabweichung     : {s['std']:.3f} µs")
+    print(f"90. Perzentil          : {s['p90']:.3f} µs")
+    print(f"95. Perzentil          : {s['p95']:.3f} µs")
+    print(f"99. Perzentil          : {s['p99']:.3f} µs")
+    print(f"95% Konfidenzintervall : [{s['ci_unten']:.3f}, {s['ci_oben']:.3f}] µs")
     print("=" * 70)
 
 
-def zeichne_histogramm(daten_ns: np.ndarray, dateiname: str, x_max_us: float | None = None) -> None:
+def dezimiere_minmax(werte: np.ndarray, max_punkte: int, start: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Min/Max-Dezimierung für Linien- und Punktplots: teilt die Werte in max_punkte/2 Abschnitte
+    und behält je Abschnitt Minimum und Maximum (in zeitlicher Reihenfolge).
+    Ausreißer bleiben so sichtbar, anders als bei einfacher Unterabtastung.
+    Gibt (Messindizes, Werte) zurück; start verschiebt die Indizes.
+    """
+    n = len(werte)
+    if max_punkte <= 0 or n <= max_punkte:
+        return np.arange(start, start + n), werte
+    abschnitte = max(max_punkte // 2, 1)
+    groesse = -(-n // abschnitte)
+    rest = abschnitte * groesse - n
+    # Auffüllen mit +-inf, damit der letzte (kürzere) Abschnitt nichts Falsches auswählt
+    tief = np.concatenate((werte, np.full(rest, np.inf))).reshape(abschnitte, groesse)
+    hoch = np.concatenate((werte, np.full(rest, -np.inf))).reshape(abschnitte, groesse)
+    basis = np.arange(abschnitte) * groesse
+    i_min = basis + np.argmin(tief, axis=1)
+    i_max = basis + np.argmax(hoch, axis=1)
+    index = np.unique(np.concatenate((i_min, i_max)))
+    index = index[index < n]
+    return index + start, werte[index]
+
+
+def leite_ab(daten_ns: np.ndarray, plots: list[str], fenster: int = 1000, max_lag: int | None = 200,
+             max_punkte: int = 20000) -> dict:
+    """
+    Berechnet die von den Plots gemeinsam genutzten Daten genau einmal:
+    µs-Werte, sortierte Werte, Histogramm-Klassen, gleitender Mittelwert und Autokorrelation.
+    Es wird nur berechnet, was die gewählten Plots brauchen.
+    Zeitreihe, Scatter und gleitender Mittelwert werden oberhalb von max_punkte
+    Min/Max-dezimiert (0 = nie).
+    """
+    daten_us = daten_ns / 1000.0
+    d = {"us": daten_us, "n": len(daten_us)}
+    if any(p in plots for p in ("zeitreihe", "scatter", "rolling_mean")):
+        d["verlauf"] = dezimiere_minmax(daten_us, max_punkte)
+        if len(d["verlauf"][0]) < len(daten_us):
+            print(f"Min/Max-Dezimierung: {len(daten_us)} -> {len(d['verlauf'][0])} Punkte "
+                  f"für Zeitreihe, Scatter und gleitenden Mittelwert")
+    if "histogramm" in plots or "histogramm_log" in plots:
+        d["hist"] = np.histogram(daten_us, bins=50)
+    if "cdf" in plots:
+        d["sortiert"] = np.sort(daten_us)
+    if "rolling_mean" in plots:
+        # Gleitender Mittelwert über kumulierte Summen in O(n); die ersten fenster-1 Werte sind NaN
+        summen = np.cumsum(np.concatenate(([0.0], daten_us)))
+        roll = np.full(len(daten_us), np.nan)
+        if len(daten_us) >= fenster:
+            roll[fenster - 1:] = (summen[fenster:] - summen[:-fenster]) / fenster
+        # Nur der gültige Teil (ohne führende NaN) wird dezimiert
+        d["rolling"] = dezimiere_minmax(roll[fenster - 1:], max_punkte, start=fenster - 1)
+        d["fenster"] = fenster
+    if "autocorr" in plots or "pacf" in plots:
+        d["acf"] = autokorrelation(daten_us, None if max_lag is None else max_lag - 1)
+    if "pacf" in plots:
+        if len(d["acf"]) > PACF_MAX_LAG + 1:
+            print(f"Partielle Autokorrelation nur bis Lag {PACF_MAX_LAG}")
+        d["pacf"] = partielle_autokorrelation(d["acf"][:PACF_MAX_LAG + 1], len(daten_us))
+    return d
+
+
+def neue_figur(figsize: tuple[float, float]) -> tuple[Figure, Axes]:
+    """
+    Figur über die objektorientierte API mit Agg-Canvas (ohne pyplot, prozesssicher).
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def speichere(fig: Figure, dateiname: str) -> None:
+    fig.tight_layout()
+    fig.savefig(dateiname, dpi=300)
+
+
+def zeichne_histogramm(d: dict, dateiname: str, x_max_us: float | None = None) -> None:
     """
     Zeichnet ein Histogramm der Latenzen (in µs) und speichert es als PNG.
     Optional kann die x-Achse auf x_max_us begrenzt werden.
     """
-    daten_us = daten_ns / 1000.0
+    zaehler, grenzen = d["hist"]
 
-    plt.figure(figsize=(8, 5))
-    plt.hist(daten_us, bins=50, edgecolor="black", linewidth=0.5)
-    plt.xlabel("Verweildauer in der Pipe (µs)")
-    plt.ylabel("Häufigkeit")
-    plt.title("Histogramm der Pipe-Verweildauer (Einweg)")
+    fig, ax = neue_figur((8, 5))
+    ax.hist(grenzen[:-1], bins=grenzen, weights=zaehler, edgecolor="black", linewidth=0.5)
+    ax.set_xlabel("Verweildauer in der Pipe (µs)")
+    ax.set_ylabel("Häufigkeit")
+    ax.set_title("Histogramm der Pipe-Verweildauer (Einweg)")
     if x_max_us is not None:
-        plt.xlim(0, x_max_us)
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+        ax.set_xlim(0, x_max_us)
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_histogramm_log(daten_ns: np.ndarray, dateiname: str) -> None:
+def zeichne_histogramm_log(d: dict, dateiname: str) -> None:
     """
     Histogramm mit logarithmischer y-Achse (in µs), um seltene Ausreißer sichtbar zu machen.
     """
-    daten_us = daten_ns / 1000.0
+    zaehler, grenzen = d["hist"]
 
-    plt.figure(figsize=(8, 5))
-    plt.hist(daten_us, bins=50, edgecolor="black", linewidth=0.5)
-    plt.yscale("log")
-    plt.xlabel("Verweildauer in der Pipe (µs)")
-    plt.ylabel("Häufigkeit (log-Skala)")
-    plt.title("Histogramm der Pipe-Verweildauer (log. Skala)")
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+    fig, ax = neue_figur((8, 5))
+    ax.hist(grenzen[:-1], bins=grenzen, weights=zaehler, edgecolor="black", linewidth=0.5)
+    ax.set_yscale("log")
+    ax.set_xlabel("Verweildauer in der Pipe (µs)")
+    ax.set_ylabel("Häufigkeit (log-Skala)")
+    ax.set_title("Histogramm der Pipe-Verweildauer (log. Skala)")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_boxplot(daten_ns: np.ndarray, dateiname: str) -> None:
+def zeichne_boxplot(d: dict, dateiname: str) -> None:
     """
     Zeichnet einen Boxplot der Latenzen (in µs).
     """
-    daten_us = daten_ns / 1000.0
-
-    plt.figure(figsize=(5, 6))
-    plt.boxplot(daten_us, vert=True, showfliers=True)
-    plt.ylabel("Verweildauer in der Pipe (µs)")
-    plt.title("Boxplot der Pipe-Verweildauer (Einweg)")
-    plt.grid(True, axis="y", linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+    fig, ax = neue_figur((5, 6))
+    ax.boxplot(d["us"], showfliers=True)
+    ax.set_ylabel("Verweildauer in der Pipe (µs)")
+    ax.set_title("Boxplot der Pipe-Verweildauer (Einweg)")
+    ax.grid(True, axis="y", linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_zeitreihe(daten_ns: np.ndarray, dateiname: str, y_max_us: float | None = None) -> None:
+def zeichne_zeitreihe(d: dict, dateiname: str, y_max_us: float | None = None) -> None:
     """
     Zeitreihenplot der Latenzen (in µs).
     """
-    daten_us = daten_ns / 1000.0
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(daten_us, linewidth=0.5)
-    plt.xlabel("Messung Nr.")
-    plt.ylabel("Verweildauer (µs)")
-    plt.title("Pipe-Verweildauer über der Zeit")
+    fig, ax = neue_figur((10, 4))
+    ax.plot(*d["verlauf"], linewidth=0.5)
+    ax.set_xlabel("Messung Nr.")
+    ax.set_ylabel("Verweildauer (µs)")
+    ax.set_title("Pipe-Verweildauer über der Zeit")
     if y_max_us is not None:
-        plt.ylim(0, y_max_us)
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+        ax.set_ylim(0, y_max_us)
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_scatter(daten_ns: np.ndarray, dateiname: str, y_max_us: float | None = None) -> None:
+def zeichne_scatter(d: dict, dateiname: str, y_max_us: float | None = None) -> None:
     """
     Scatterplot: Messwert vs. Messindex (in µs).
     """
-    daten_us = daten_ns / 1000.0
-
-    plt.figure(figsize=(10, 4))
-    plt.scatter(range(len(daten_us)), daten_us, s=2, alpha=0.5)
-    plt.xlabel("Messung Nr.")
-    plt.ylabel("Verweildauer (µs)")
-    plt.title("Pipe-Verweildauer – Scatterplot")
+    fig, ax = neue_figur((10, 4))
+    ax.scatter(*d["verlauf"], s=2, alpha=0.5)
+    ax.set_xlabel("Messung Nr.")
+    ax.set_ylabel("Verweildauer (µs)")
+    ax.set_title("Pipe-Verweildauer – Scatterplot")
     if y_max_us is not None:
-        plt.ylim(0, y_max_us)
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+        ax.set_ylim(0, y_max_us)
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_rolling_mean(daten_ns: np.ndarray, dateiname: str, fenster: int = 1000) -> None:
+def zeichne_rolling_mean(d: dict, dateiname: str) -> None:
     """
     Zeichnet den gleitenden Mittelwert der Latenzen (in µs).
     """
-    daten_us = daten_ns / 1000.0
-    s = pd.Series(daten_us)
-    roll = s.rolling(window=fenster).mean()
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(daten_us, linewidth=0.3, alpha=0.3, label="Einzelmessungen")
-    plt.plot(roll, linewidth=1.0, label=f"Gleitender Mittelwert (Fenster={fenster})")
-    plt.xlabel("Messung Nr.")
-    plt.ylabel("Verweildauer (µs)")
-    plt.title("Pipe-Verweildauer – gleitender Mittelwert")
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
-
-
-def zeichne_cdf(daten_ns: np.ndarray, dateiname: str) -> None:
+    fig, ax = neue_figur((10, 4))
+    ax.plot(*d["verlauf"], linewidth=0.3, alpha=0.3, label="Einzelmessungen")
+    ax.plot(*d["rolling"], linewidth=1.0, label=f"Gleitender Mittelwert (Fenster={d['fenster']})")
+    ax.set_xlabel("Messung Nr.")
+    ax.set_ylabel("Verweildauer (µs)")
+    ax.set_title("Pipe-Verweildauer – gleitender Mittelwert")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    ax.legend()
+    speichere(fig, dateiname)
+
+
+def zeichne_cdf(d: dict, dateiname: str) -> None:
     """
     Zeichnet die empirische Verteilungsfunktion (CDF) der Latenzen (in µs).
     """
-    daten_us = np.sort(daten_ns / 1000.0)
-    n = len(daten_us)
+    n = d["n"]
     y = np.arange(1, n + 1) / n
 
-    plt.figure(figsize=(8, 5))
-    plt.plot(daten_us, y, linewidth=1.0)
-    plt.xlabel("Verweildauer in der Pipe (µs)")
-    plt.ylabel("Kumulative Wahrscheinlichkeit")
-    plt.title("Empirische Verteilungsfunktion (CDF) der Pipe-Verweildauer")
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
-    print(f"  {dateiname}")
+    fig, ax = neue_figur((8, 5))
+    ax.plot(d["sortiert"], y, linewidth=1.0)
+    ax.set_xlabel("Verweildauer in der Pipe (µs)")
+    ax.set_ylabel("Kumulative Wahrscheinlichkeit")
+    ax.set_title("Empirische Verteilungsfunktion (CDF) der Pipe-Verweildauer")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
 
 
-def zeichne_autokorrelation(daten_ns: np.ndarray, dateiname: str, max_lag: int = 200) -> None:
+# Die direkte Summe kostet O(n) je Lag, die FFT O(n log n) für alle Lags zusammen:
+# direkt, solange max_lag < ACF_DIREKT_FAKTOR * log2(n) (gemessen mit bench_autokorrelation.py)
+ACF_DIREKT_FAKTOR = 20
+
+# Höchstens so viele Lags für die partielle Autokorrelation (Durbin-Levinson kostet O(Lags²)),
+# auch wenn die Autokorrelation mit --max-lag 0 bis n/2 reicht
+PACF_MAX_LAG = 1000
+
+
+def autokorrelation(daten_ns: np.ndarray, max_lag: int | None = None) -> np.ndarray:
     """
-    Autokorrelation der Latenzen (in µs).
+    Autokorrelation für die Lags 0..max_lag (Standard: n/2). Wenige Lags werden direkt
+    als Skalarprodukte berechnet, viele über eine FFT mit Nullauffüllung auf >= 2n, also ohne
+    zyklische Überlappung, in O(n log n). Lag k wird durch die Anzahl überlappender Werte (n - k) geteilt.
     """
-    daten_us = daten_ns / 1000.0
-    daten_norm = (daten_us - np.mean(daten_us)) / np.std(daten_us)
-
-    autocorr = []
-    for lag in range(1, max_lag):
-        v1 = daten_norm[:-lag]
-        v2 = daten_norm[lag:]
-        autocorr.append(np.correlate(v1, v2)[0] / len(v1))
-
-    plt.figure(figsize=(8, 5))
-    plt.stem(range(1, max_lag), autocorr, linefmt='-', markerfmt='o', basefmt=' ')
-    plt.xlabel("Lag")
-    plt.ylabel("Autokorrelation")
-    plt.title("Autokorrelation der Pipe-Verweildauer")
-    plt.grid(True, linewidth=0.3, alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(dateiname, dpi=300)
-    plt.close()
+    n = len(daten_ns)
+    if max_lag is None:
+        max_lag = n // 2
+    max_lag = min(max_lag, n - 1)
+    daten_norm = (daten_ns - np.mean(daten_ns)) / np.std(daten_ns)
+
+    if max_lag < ACF_DIREKT_FAKTOR * math.log2(max(n, 2)):
+        summen = np.array([np.dot(daten_norm[:n - k], daten_norm[k:]) for k in range(max_lag + 1)])
+    else:
+        laenge = 1 << (2 * n - 1).bit_length()
+        spektrum = np.fft.rfft(daten_norm, n=laenge)
+        summen = np.fft.irfft(spektrum * np.conj(spektrum), n=laenge)[:max_lag + 1]
+    return summen / (n - np.arange(max_lag + 1))
+
+
+def partielle_autokorrelation(acf: np.ndarray, n: int) -> np.ndarray:
+    """
+    Partielle Autokorrelation für die Lags 0..len(acf)-1 aus der Autokorrelation
+    (Durbin-Levinson, O(max_lag²)). Verwendet den verzerrten Schätzer (Division durch n),
+    damit die Rekursion stabil bleibt.
+    """
+    lags = np.arange(len(acf))
+    r = acf * (n - lags) / n
+    pacf = np.empty(len(acf))
+    pacf[0] = 1.0
+    if len(acf) == 1:
+        return pacf
+    # phi[:k] sind die AR-Koeffizienten der Ordnung k, in einem vorab angelegten Puffer
+    phi = np.empty(len(acf))
+    phi[0] = r[1]
+    varianz = 1.0 - r[1] ** 2
+    pacf[1] = r[1]
+    for k in range(2, len(acf)):
+        phi_kk = (r[k] - np.dot(phi[:k - 1], r[k - 1:0:-1])) / varianz
+        phi[:k - 1] -= phi_kk * phi[k - 2::-1]
+        phi[k - 1] = phi_kk
+        varianz *= 1.0 - phi_kk ** 2
+        pacf[k] = phi_kk
+    return pacf
+
+
+def zeichne_autokorrelation(d: dict, dateiname: str, partiell: bool = False) -> None:
+    """
+    Autokorrelation der Latenzen (in µs) für die Lags 1..max_lag-1 (aus leite_ab).
+    Mit partiell=True wird stattdessen die partielle Autokorrelation gezeichnet.
+    """
+    werte = d["pacf"] if partiell else d["acf"]
+    lags = np.arange(1, len(werte))
+    name = "Partielle Autokorrelation" if partiell else "Autokorrelation"
+
+    fig, ax = neue_figur((8, 5))
+    if len(lags) <= 500:
+        ax.stem(lags, werte[1:], linefmt='-', markerfmt='o', basefmt=' ')
+    else:
+        # Bei sehr vielen Lags wäre stem unlesbar und langsam
+        ax.plot(lags, werte[1:], linewidth=0.5)
+    ax.set_xlabel("Lag")
+    ax.set_ylabel(name)
+    ax.set_title(f"{name} der Pipe-Verweildauer")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
+
+
+# Alle Plots: Name -> (Zeichenfunktion, Dateiname, Parameter), alle in µs beschriftet
+PLOTS = {
+    "histogramm": (zeichne_histogramm, "results/pipe_latenz_histogramm.png", {"x_max_us": 200.0}),
+    "histogramm_log": (zeichne_histogramm_log, "results/pipe_latenz_histogramm_log.png", {}),
+    "boxplot": (zeichne_boxplot, "results/pipe_latenz_boxplot.png", {}),
+    "cdf": (zeichne_cdf, "results/pipe_latenz_cdf.png", {}),
+    "zeitreihe": (zeichne_zeitreihe, "results/pipe_latenz_zeitreihe.png", {"y_max_us": 250.0}),
+    "scatter": (zeichne_scatter, "results/pipe_latenz_scatter.png", {"y_max_us": 250.0}),
+    "rolling_mean": (zeichne_rolling_mean, "results/pipe_latenz_rolling_mean.png", {}),
+    "autocorr": (zeichne_autokorrelation, "results/pipe_latenz_autocorr.png", {}),
+    "pacf": (zeichne_autokorrelation, "results/pipe_latenz_pacf.png", {"partiell": True}),
+}
+STANDARD_PLOTS = [name for name in PLOTS if name != "pacf"]
+
+# Abgeleitete Daten für die Worker; per fork geerbt statt für jeden Plot gepickelt
+_abgeleitet: dict = {}
+
+
+def _zeichne(name: str) -> tuple[str, float]:
+    funktion, dateiname, parameter = PLOTS[name]
+    start = time.perf_counter()
+    funktion(_abgeleitet, dateiname, **parameter)
+    return dateiname, time.perf_counter() - start
+
+
+def zeichne_plots(d: dict, plots: list[str], prozesse: int) -> None:
+    """
+    Zeichnet die gewählten Plots, bei prozesse > 1 parallel in einem Prozesspool.
+    """
+    global _abgeleitet
+    _abgeleitet = d
+    if prozesse > 1 and len(plots) > 1:
+        ctx = mp.get_context("fork")
+        with ProcessPoolExecutor(max_workers=min(prozesse, len(plots)), mp_context=ctx) as pool:
+            for dateiname, dauer in pool.map(_zeichne, plots):
+                print(f"  {dateiname} ({dauer:.2f} s)")
+    else:
+        for name in plots:
+            dateiname, dauer = _zeichne(name)
+            print(f"  {dateiname} ({dauer:.2f} s)")
+
+
+def zeichne_live(verlauf: collections.deque, dateiname: str, fenster: int) -> None:
+    """
+    Verlauf von gleitendem Mittelwert und gleitendem p99 während einer --follow-Analyse (in µs).
+    """
+    n, mittel, p99 = np.array(verlauf).T
+
+    fig, ax = neue_figur((10, 4))
+    ax.plot(n, mittel / 1000.0, linewidth=1.0, label=f"Gleitender Mittelwert (Fenster={fenster})")
+    ax.plot(n, p99 / 1000.0, linewidth=1.0, label=f"Gleitendes 99. Perzentil (Fenster={fenster})")
+    ax.set_xlabel("Messung Nr.")
+    ax.set_ylabel("Verweildauer (µs)")
+    ax.set_title("Pipe-Verweildauer – Live-Verlauf")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    ax.legend()
+    speichere(fig, dateiname)
+
+
+def verfolge(pfad: str, fenster: int, intervall: float, plot_intervall: float, leerlauf_s: float) -> None:
+    """
+    Live-Analyse einer wachsenden Messdatei (Pipe_latenz --live): neue Werte werden inkrementell
+    in Gesamtstatistik und gleitendes Fenster übernommen, ohne die Datei erneut zu lesen.
+    Gibt periodisch eine Zusammenfassung aus und frischt results/pipe_latenz_live.png auf.
+    """
+    welford = Welford()
+    histogramm = LogHistogramm()
+    gleitend = GleitendesFenster(fenster)
+    # Ein Punkt je Auffrischung, begrenzt, damit der Speicher nicht mit der Laufzeit wächst
+    verlauf = collections.deque(maxlen=10000)
+    dateiname = "results/pipe_latenz_live.png"
+    letzte_ausgabe = letzter_plot = time.monotonic()
+    letzte_n = 0
+
+    print(f"Verfolge {pfad} (Strg+C beendet)...")
+    try:
+        for block in folge_datei(pfad, intervall, leerlauf_s):
+            welford.update(block)
+            histogramm.update(block)
+            gleitend.update(block)
+            jetzt = time.monotonic()
+            # Nur auffrischen, wenn seit der letzten Ausgabe Werte hinzukamen
+            if welford.n == letzte_n or jetzt - letzte_ausgabe < intervall:
+                continue
+            letzte_ausgabe = jetzt
+            letzte_n = welford.n
+            verlauf.append((welford.n, gleitend.mittelwert(), gleitend.quantil(0.99)))
+            print(f"n={welford.n:>10}  Mittel {welford.mean / 1000.0:8.3f} µs  "
+                  f"Median {histogramm.quantil(0.5) / 1000.0:8.3f} µs  "
+                  f"p99 {histogramm.quantil(0.99) / 1000.0:8.3f} µs  |  "
+                  f"Fenster: Mittel {gleitend.mittelwert() / 1000.0:8.3f} µs  "
+                  f"p99 {gleitend.quantil(0.99) / 1000.0:8.3f} µs")
+            if jetzt - letzter_plot >= plot_intervall:
+                letzter_plot = jetzt
+                zeichne_live(verlauf, dateiname, fenster)
+    except KeyboardInterrupt:
+        pass
+
+    if welford.n == 0:
+        print("Keine gültigen Messwerte gefunden.")
+        return
+    verlauf.append((welford.n, gleitend.mittelwert(), gleitend.quantil(0.99)))
+    zeichne_live(verlauf, dateiname, fenster)
+    print()
+    gib_statistik_aus(zusammenfassung(welford, histogramm),
+                      "Live-Statistik für die Pipe-Verweildauer (Einweg) [µs]")
     print(f"  {dateiname}")
 
 
+def plot_schluessel(cache: AnalyseCache, daten_hash: str, name: str, fenster: int,
+                    max_lag: int | None, max_punkte: int) -> str:
+    """
+    Cache-Schlüssel eines Plots: Inhalts-Hash plus die Parameter, die sein Aussehen bestimmen.
+    """
+    parameter = PLOTS[name][2]
+    relevant = {"parameter": parameter}
+    if name in ("zeitreihe", "scatter", "rolling_mean"):
+        relevant["max_punkte"] = max_punkte
+    if name == "rolling_mean":
+        relevant["fenster"] = fenster
+    if name in ("autocorr", "pacf"):
+        relevant["max_lag"] = max_lag
+    return cache.schluessel(daten_hash, "plot", name=name, **relevant)
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Verwendung: python3 messwerte_analyse.py results/pipe_latenz.csv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Statistik und Plots der Pipe-Verweildauer.")
+    parser.add_argument("pfad", help="results/pipe_latenz.csv oder results/pipe_latenz.bin")
+    parser.add_argument("--streaming", action="store_true",
+                        help="nur Statistik, blockweise in konstantem Speicher (Quantile auf 0.1 %% genau)")
+    parser.add_argument("--max-lag", type=int, default=200,
+                        help="größter Lag der Autokorrelation, 0 = bis n/2 (Standard 200)")
+    parser.add_argument("--pacf", action="store_true",
+                        help=f"zusätzlich die partielle Autokorrelation zeichnen (höchstens {PACF_MAX_LAG} Lags)")
+    parser.add_argument("--plots", nargs="+", choices=list(PLOTS), metavar="PLOT",
+                        help=f"nur diese Plots zeichnen ({', '.join(PLOTS)})")
+    parser.add_argument("--max-punkte", type=int, default=20000,
+                        help="Zeitreihe, Scatter und gleitenden Mittelwert oberhalb dieser Anzahl "
+                             "Min/Max-dezimieren, 0 = nie (Standard 20000)")
+    parser.add_argument("--prozesse", type=int, default=os.cpu_count() or 1,
+                        help="Anzahl paralleler Zeichenprozesse (Standard: Anzahl CPUs)")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="RESAMPLES",
+                        help="Bootstrap-Konfidenzintervalle für Median, p95, p99, p99.9 (z. B. 10000)")
+    parser.add_argument("--follow", action="store_true",
+                        help="wachsende Datei live verfolgen (Pipe_latenz --live), Statistik inkrementell")
+    parser.add_argument("--fenster", type=int, default=10000,
+                        help="Größe des gleitenden Fensters für --follow (Standard 10000)")
+    parser.add_argument("--intervall", type=float, default=1.0,
+                        help="Sekunden zwischen zwei Zusammenfassungen bei --follow (Standard 1)")
+    parser.add_argument("--plot-intervall", type=float, default=5.0,
+                        help="Sekunden zwischen zwei Plot-Aktualisierungen bei --follow (Standard 5)")
+    parser.add_argument("--leerlauf", type=float, default=0.0,
+                        help="--follow beenden, wenn so viele Sekunden nichts hinzukam (Standard 0 = nie)")
+    parser.add_argument("--kein-cache", action="store_true",
+                        help="Ergebnisse weder aus dem Cache lesen noch dort ablegen")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Cache-Verzeichnis (Standard: $ANALYSE_CACHE_DIR oder ~/.cache/os-experiments-analyse)")
+    parser.add_argument("--cache-max-mb", type=int, default=1024,
+                        help="Größe, auf die der Cache nach dem Lauf verkleinert wird (Standard 1024 MB)")
+    parser.add_argument("--cache-max-tage", type=float, default=7.0,
+                        help="Einträge, die so lange ungenutzt sind, werden entfernt (Standard 7)")
+    args = parser.parse_args()
+    pfad = args.pfad
+    start = time.perf_counter()
+
+    if args.follow:
+        verfolge(pfad, args.fenster, args.intervall, args.plot_intervall, args.leerlauf)
+        return
+
+    cache = None
+    daten_hash = ""
+    if not args.kein_cache:
+        cache = AnalyseCache(args.cache_dir, max_bytes=args.cache_max_mb << 20,
+                             max_alter_s=args.cache_max_tage * 24 * 3600)
+        try:
+            daten_hash = datei_hash(pfad)
+        except FileNotFoundError:
+            print(f"Fehler: Datei '{pfad}' nicht gefunden.")
+            sys.exit(1)
+
+    if args.streaming:
+        schluessel = cache.schluessel(daten_hash, "streaming") if cache else ""
+        s = cache.lade_json(schluessel) if cache else None
+        if s is None:
+            try:
+                s = streaming_statistik(lies_bloecke(pfad))
+            except FileNotFoundError:
+                print(f"Fehler: Datei '{pfad}' nicht gefunden.")
+                sys.exit(1)
+            if cache:
+                cache.speichere_json(schluessel, s)
+        if s["n"] == 0:
+            print("Keine gültigen Messwerte gefunden.")
+            sys.exit(1)
+        gib_statistik_aus(s, "Streaming-Statistik für die Pipe-Verweildauer (Einweg) [µs]")
+        if cache:
+            cache.aufraeumen()
+        return
 
-    pfad = sys.argv[1]
-    daten_ns = lade_csv(pfad)
+    # Eingelesene CSV-Messwerte werden als .npy abgelegt und beim nächsten Mal per mmap geladen;
+    # Binärdateien werden ohnehin per mmap eingeblendet, eine Kopie im Cache brächte nichts
+    csv_cache = cache if cache and not ist_binaer(pfad) else None
+    schluessel = csv_cache.schluessel(daten_hash, "messwerte") if csv_cache else ""
+    daten_ns = csv_cache.lade_array(schluessel) if csv_cache else None
+    if daten_ns is None:
+        daten_ns = lade_messwerte(pfad)
+        if csv_cache:
+            csv_cache.speichere_array(schluessel, daten_ns)
+    else:
+        print("Messwerte aus dem Cache geladen.")
 
     if len(daten_ns) == 0:
         print("Keine gültigen Messwerte gefunden.")
         sys.exit(1)
 
     # 1. Statistik ausgeben
-    berechne_statistik(daten_ns)
+    schluessel = cache.schluessel(daten_hash, "statistik") if cache else ""
+    s = cache.lade_json(schluessel) if cache else None
+    if s is None:
+        s = berechne_statistik(daten_ns)
+        if cache:
+            cache.speichere_json(schluessel, s)
+    else:
+        gib_statistik_aus(s)
+
+    if args.bootstrap > 0:
+        schluessel = cache.schluessel(daten_hash, "bootstrap", resamples=args.bootstrap) if cache else ""
+        ki = cache.lade_json(schluessel) if cache else None
+        if ki is None:
+            ki = konfidenzintervalle(daten_ns, args.bootstrap)
+            if cache:
+                cache.speichere_json(schluessel, ki)
+        gib_intervalle_aus(ki, args.bootstrap)
+        print("=" * 70)
     print("\nErzeuge Plots...\n")
 
-    # 2. Plots erzeugen (alle in µs beschriftet)
-    zeichne_histogramm(daten_ns, "results/pipe_latenz_histogramm.png", x_max_us=200.0)
-    zeichne_histogramm_log(daten_ns, "results/pipe_latenz_histogramm_log.png")
-    zeichne_boxplot(daten_ns, "results/pipe_latenz_boxplot.png")
-    zeichne_cdf(daten_ns, "results/pipe_latenz_cdf.png")
-    zeichne_zeitreihe(daten_ns, "results/pipe_latenz_zeitreihe.png", y_max_us=250.0)
-    zeichne_scatter(daten_ns, "results/pipe_latenz_scatter.png", y_max_us=250.0)
-    zeichne_rolling_mean(daten_ns, "results/pipe_latenz_rolling_mean.png", fenster=1000)
-    zeichne_autokorrelation(daten_ns, "results/pipe_latenz_autocorr.png", max_lag=200)
-
-    print("\nFertig. Plots wurden in 'results/' gespeichert.")
+    # 2. Plots aus dem Cache kopieren, die übrigen aus einmal berechneten Daten parallel zeichnen
+    plots = args.plots or STANDARD_PLOTS + (["pacf"] if args.pacf else [])
+    max_lag = args.max_lag or None
+    schluessel = {name: plot_schluessel(cache, daten_hash, name, 1000, max_lag, args.max_punkte)
+                  for name in plots} if cache else {}
+    fehlend = []
+    for name in plots:
+        if cache and cache.lade_datei(schluessel[name], PLOTS[name][1]):
+            print(f"  {PLOTS[name][1]} (Cache)")
+        else:
+            fehlend.append(name)
+
+    vorbereitung = time.perf_counter()
+    if fehlend:
+        d = leite_ab(daten_ns, fehlend, fenster=1000, max_lag=max_lag, max_punkte=args.max_punkte)
+    zeichnen = time.perf_counter()
+    if fehlend:
+        zeichne_plots(d, fehlend, args.prozesse)
+        if cache:
+            for name in fehlend:
+                cache.speichere_datei(schluessel[name], PLOTS[name][1])
+    ende = time.perf_counter()
+
+    if cache:
+        entfernt = cache.aufraeumen()
+        if entfernt:
+            print(f"Cache: {entfernt} alte Einträge entfernt.")
+
+    print(f"\nFertig. {len(plots)} Plots wurden in 'results/' gespeichert "
+          f"({len(plots) - len(fehlend)} aus dem Cache).")
+    print(f"Gesamtzeit {ende - start:.2f} s (Laden und Statistik {vorbereitung - start:.2f} s, "
+          f"abgeleitete Daten {zeichnen - vorbereitung:.2f} s, Zeichnen {ende - zeichnen:.2f} s "
+          f"mit {min(args.prozesse, max(len(fehlend), 1))} Prozessen)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+import os
+import sys
+import math
+import time
+import struct
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from messdatei import BIN_ANZAHL_OFFSET, BIN_KOPF, BIN_MAGIC, ist_binaer, vollstaendige_anzahl
+
+
+# Messwerte pro Block beim blockweisen Einlesen
+BLOCKGROESSE = 1 << 20
+
+
+class Welford:
+    """
+    Anzahl, Minimum, Maximum, Mittelwert und Varianz in konstantem Speicher.
+    Blöcke werden vektorisiert zusammengefasst und nach Chan et al. mit dem
+    bisherigen Zustand vereinigt (numerisch stabil wie Welford).
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, block: np.ndarray) -> None:
+        if len(block) == 0:
+            return
+        n_b = len(block)
+        mean_b = float(np.mean(block))
+        m2_b = float(np.sum((block - mean_b) ** 2))
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        self.min = min(self.min, float(np.min(block)))
+        self.max = max(self.max, float(np.max(block)))
+
+    def varianz(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class LogHistogramm:
+    """
+    Histogramm mit logarithmisch wachsenden Klassen (wie HDR-Histogramme):
+    jeder Wert landet in einer Klasse mit relativer Breite `genauigkeit`,
+    Quantile haben damit höchstens diesen relativen Fehler.
+    Der Speicher hängt nur vom Wertebereich ab, nicht von der Anzahl der Werte.
+    """
+
+    def __init__(self, kleinster: float = 1.0, groesster: float = 1e12, genauigkeit: float = 1e-3) -> None:
+        self.kleinster = kleinster
+        self.log_basis = math.log1p(genauigkeit)
+        anzahl = int(math.ceil(math.log(groesster / kleinster) / self.log_basis)) + 1
+        self.zaehler = np.zeros(anzahl, dtype=np.int64)
+
+    def __klassen(self, block: np.ndarray) -> np.ndarray:
+        # Werte außerhalb des Bereichs landen in der ersten bzw. letzten Klasse
+        werte = np.maximum(block, self.kleinster)
+        index = (np.log(werte / self.kleinster) / self.log_basis).astype(np.int64)
+        np.clip(index, 0, len(self.zaehler) - 1, out=index)
+        return np.bincount(index, minlength=len(self.zaehler))
+
+    def update(self, block: np.ndarray) -> None:
+        self.zaehler += self.__klassen(block)
+
+    def entferne(self, block: np.ndarray) -> None:
+        """
+        Nimmt zuvor mit update() eingetragene Werte wieder heraus (gleitende Fenster).
+        """
+        self.zaehler -= self.__klassen(block)
+
+    def quantil(self, q: float) -> float:
+        kumuliert = np.cumsum(self.zaehler)
+        if kumuliert[-1] == 0:
+            return math.nan
+        rang = q * (kumuliert[-1] - 1)
+        klasse = int(np.searchsorted(kumuliert, rang, side="right"))
+        # Geometrische Mitte der Klasse
+        return self.kleinster * math.exp((klasse + 0.5) * self.log_basis)
+
+
+class GleitendesFenster:
+    """
+    Die letzten `groesse` Werte in einem Ringpuffer. Der Mittelwert kommt aus einer laufenden
+    Summe (O(1) je Wert), Quantile aus einem Histogramm, in das neue Werte eingetragen und
+    herausfallende wieder ausgetragen werden; nichts wird beim Abfragen neu sortiert.
+    """
+
+    def __init__(self, groesse: int) -> None:
+        self.puffer = np.zeros(groesse)
+        self.pos = 0
+        self.n = 0
+        self.summe = 0.0
+        self.histogramm = LogHistogramm()
+
+    def update(self, block: np.ndarray) -> None:
+        groesse = len(self.puffer)
+        if len(block) > groesse:
+            block = block[-groesse:]
+        if len(block) == 0:
+            return
+        index = (self.pos + np.arange(len(block))) % groesse
+        if self.n == groesse:
+            alt = self.puffer[index]
+        else:
+            # Solange der Puffer nicht voll ist, fallen nur die Werte über die Größe hinaus heraus
+            ueberlauf = max(self.n + len(block) - groesse, 0)
+            alt = self.puffer[index[len(block) - ueberlauf:]]
+        self.summe += float(np.sum(block)) - float(np.sum(alt))
+        self.histogramm.entferne(alt)
+        self.histogramm.update(block)
+        self.puffer[index] = block
+        self.pos = (self.pos + len(block)) % groesse
+        self.n = min(self.n + len(block), groesse)
+
+    def mittelwert(self) -> float:
+        return self.summe / self.n if self.n else math.nan
+
+    def quantil(self, q: float) -> float:
+        return self.histogramm.quantil(q)
+
+
+def lies_bloecke(pfad: str, blockgroesse: int = BLOCKGROESSE):
+    """
+    Liefert die Einweg-Latenzen (ns) einer Binär- oder CSV-Datei blockweise,
+    ohne die ganze Datei in den Speicher zu holen.
+    """
+    if ist_binaer(pfad):
+        with open(pfad, "rb") as f:
+            _, _, kopf_groesse, anzahl, _, _ = BIN_KOPF.unpack(f.read(BIN_KOPF.size))
+            anzahl = vollstaendige_anzahl(pfad, kopf_groesse, anzahl)
+            f.seek(kopf_groesse)
+            gelesen = 0
+            while gelesen < anzahl:
+                block = np.fromfile(f, dtype="<i8", count=min(blockgroesse, anzahl - gelesen))
+                if len(block) == 0:
+                    break
+                gelesen += len(block)
+                yield block * 0.5  # Round-Trip -> Einweg
+    else:
+        for df in pd.read_csv(pfad, usecols=["latenz_ns"], chunksize=blockgroesse):
+            yield df["latenz_ns"].to_numpy(dtype=float)
+
+
+def folge_datei(pfad: str, intervall: float = 1.0, leerlauf_s: float = 0.0):
+    """
+    Liefert wie `tail -f` die neu angehängten Einweg-Latenzen (ns) einer wachsenden CSV- oder
+    Binärdatei (Pipe_latenz --live); bereits gelesene Daten werden nie erneut gelesen.
+    Ohne neue Daten wird ein leerer Block geliefert, damit der Aufrufer seine Ausgabe
+    auffrischen kann. Endet, wenn eine Binärdatei vollständig ist oder leerlauf_s
+    Sekunden (> 0) lang nichts hinzukam.
+    """
+    while not os.path.exists(pfad):
+        yield np.empty(0)
+        time.sleep(intervall)
+
+    with open(pfad, "rb") as f:
+        # Format bestimmen, sobald Kopf bzw. Kopfzeile vollständig geschrieben sind
+        rest = b""
+        while True:
+            rest += f.read()
+            if rest.startswith(BIN_MAGIC) and len(rest) >= BIN_KOPF.size:
+                binaer = True
+                rest = rest[BIN_KOPF.unpack(rest[:BIN_KOPF.size])[2]:]
+                break
+            if len(rest) >= len(BIN_MAGIC) and not rest.startswith(BIN_MAGIC) and b"\n" in rest:
+                binaer = False
+                rest = rest.partition(b"\n")[2]  # Kopfzeile latenz_ns
+                break
+            yield np.empty(0)
+            time.sleep(intervall)
+
+        gelesen = 0
+        letzte_daten = time.monotonic()
+        while True:
+            daten = rest + f.read()
+            if binaer:
+                ganz = len(daten) // 8 * 8
+                block = np.frombuffer(daten[:ganz], dtype="<i8") * 0.5  # Round-Trip -> Einweg
+                rest = daten[ganz:]
+            else:
+                # Eine angefangene letzte Zeile bleibt bis zum nächsten Lesen liegen
+                ende = daten.rfind(b"\n") + 1
+                block = np.array(daten[:ende].split(), dtype=float)
+                rest = daten[ende:]
+            gelesen += len(block)
+            if len(block):
+                letzte_daten = time.monotonic()
+            yield block
+
+            if binaer:
+                # Die Anzahl steht erst nach Abschluss der Messung im Kopf (sonst -1)
+                anzahl = struct.unpack("<q", os.pread(f.fileno(), 8, BIN_ANZAHL_OFFSET))[0]
+                if 0 <= anzahl <= gelesen:
+                    return
+            if leerlauf_s > 0 and time.monotonic() - letzte_daten > leerlauf_s:
+                return
+            if not len(block):
+                time.sleep(intervall)
+
+
+def zusammenfassung(welford: Welford, histogramm: LogHistogramm) -> dict:
+    """
+    Kennzahlen wie in berechne_statistik (in µs) aus dem Streaming-Zustand.
+    """
+    std = math.sqrt(welford.varianz())
+    halbweite = 1.96 * std / math.sqrt(welford.n) if welford.n else math.nan
+    return {
+        "n": welford.n,
+        "min": welford.min / 1000.0,
+        "max": welford.max / 1000.0,
+        "mean": welford.mean / 1000.0,
+        "median": histogramm.quantil(0.5) / 1000.0,
+        "std": std / 1000.0,
+        "p90": histogramm.quantil(0.90) / 1000.0,
+        "p95": histogramm.quantil(0.95) / 1000.0,
+        "p99": histogramm.quantil(0.99) / 1000.0,
+        "ci_unten": (welford.mean - halbweite) / 1000.0,
+        "ci_oben": (welford.mean + halbweite) / 1000.0,
+    }
+
+
+def streaming_statistik(bloecke) -> dict:
+    """
+    Berechnet die Kennzahlen aus berechne_statistik blockweise in konstantem Speicher (in µs).
+    """
+    welford = Welford()
+    histogramm = LogHistogramm()
+    for block in bloecke:
+        welford.update(block)
+        histogramm.update(block)
+    return zusammenfassung(welford, histogramm)
+
+
+def pruefe_genauigkeit(n: int, blockgroesse: int) -> bool:
+    """
+    Vergleicht die Streaming-Kennzahlen mit den exakten NumPy-Ergebnissen
+    auf synthetischen, rechtsschiefen Latenzen (lognormal + seltene Ausreißer).
+    """
+    rng = np.random.default_rng(1)
+    daten_ns = rng.lognormal(mean=np.log(2000.0), sigma=0.3, size=n)
+    ausreisser = rng.random(n) < 1e-3
+    daten_ns[ausreisser] *= 50
+
+    bloecke = (daten_ns[i:i + blockgroesse] for i in range(0, n, blockgroesse))
+    s = streaming_statistik(bloecke)
+    daten_us = daten_ns / 1000.0
+    exakt = {
+        "min": np.min(daten_us), "max": np.max(daten_us), "mean": np.mean(daten_us),
+        "std": np.std(daten_us, ddof=1), "median": np.median(daten_us),
+        "p90": np.percentile(daten_us, 90), "p95": np.percentile(daten_us, 95),
+        "p99": np.percentile(daten_us, 99),
+    }
+    # Momente bis auf Rundung exakt, Quantile innerhalb der Klassenbreite
+    toleranz = {"min": 1e-12, "max": 1e-12, "mean": 1e-9, "std": 1e-9,
+                "median": 1e-3, "p90": 1e-3, "p95": 1e-3, "p99": 1e-3}
+
+    ok = True
+    print(f"Prüfung mit {n} Werten in Blöcken zu {blockgroesse}")
+    for name, wert in exakt.items():
+        fehler = abs(s[name] - wert) / wert
+        bestanden = fehler <= toleranz[name]
+        ok &= bestanden
+        print(f"  {name:<7} exakt {wert:12.6f}  streaming {s[name]:12.6f}  "
+              f"rel. Fehler {fehler:.2e}  {'ok' if bestanden else 'FEHLER'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prüft die Streaming-Statistik gegen exakte NumPy-Ergebnisse.")
+    parser.add_argument("-n", type=int, default=2_000_000, help="Anzahl synthetischer Messwerte")
+    parser.add_argument("--blockgroesse", type=int, default=100_000)
+    args = parser.parse_args()
+    if not pruefe_genauigkeit(args.n, args.blockgroesse):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+import numpy as np
+
+from messdatei import lade_messwerte
+
+
+# Nutzlastgrößen des Sweeps: 1 B bis 4 MiB
+GROESSEN = [1, 64, 512, 4096, 16384, 65536, 262144, 1048576, 4194304]
+
+# Mindestzahl Messwerte je Konfiguration; nur sie kann das Datenbudget überschreiten
+MIN_ANZAHL = 10
+
+PROGRAMM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Pipe_latenz")
+
+# Zusammenfassung von Pipe_latenz --durchsatz: Gesamtdauer bis zur Bestätigung des Kindes
+DURCHSATZ_ZEILE = re.compile(r"Durchsatz: \S+ MB/s \((\d+) Nachrichten zu (\d+) Byte in (\S+) s\)")
+
+
+def dateiname(modus: str, zero_copy: bool, pipe_groesse: int, groesse: int, binaer: bool) -> str:
+    """
+    Eine Messdatei je Konfiguration, z. B. pipe_durchsatz_splice_pipe1048576_65536B.bin
+    """
+    teile = ["pipe", modus]
+    if zero_copy:
+        teile.append("splice")
+    if pipe_groesse:
+        teile.append(f"pipe{pipe_groesse}")
+    teile.append(f"{groesse}B")
+    return "_".join(teile) + (".bin" if binaer else ".csv")
+
+
+def anzahl_fuer(groesse: int, modus: str, anzahl: int, budget_bytes: int) -> int:
+    # Große Nachrichten mit weniger Wiederholungen, damit jede Konfiguration ähnlich lange dauert
+    # Im Ping-Pong-Modus läuft jede Nachricht in beide Richtungen
+    bytes_je_messwert = groesse * (2 if modus == "pingpong" else 1)
+    return max(MIN_ANZAHL, min(anzahl, budget_bytes // bytes_je_messwert))
+
+
+def messe(groesse: int, modus: str, zero_copy: bool, pipe_groesse: int, anzahl: int, pfad: str,
+          binaer: bool) -> float | None:
+    """
+    Startet Pipe_latenz für eine Konfiguration. Im Durchsatzmodus wird der von Pipe_latenz
+    gemessene Durchsatz (MB/s) zurückgegeben: übertragene Bytes durch die Zeit bis das Kind
+    alles gelesen hat. Die Messwerte selbst sind nur die Dauer der einzelnen write()-Aufrufe.
+    """
+    befehl = [PROGRAMM, str(anzahl), "--groesse", str(groesse), "--ausgabe", pfad]
+    if modus == "durchsatz":
+        befehl.append("--durchsatz")
+    if zero_copy:
+        befehl.append("--splice")
+    if pipe_groesse:
+        befehl += ["--pipe-groesse", str(pipe_groesse)]
+    if binaer:
+        befehl.append("--binaer")
+    ausgabe = subprocess.run(befehl, check=True, stdout=subprocess.PIPE, text=True).stdout
+    if modus != "durchsatz":
+        return None
+    treffer = DURCHSATZ_ZEILE.search(ausgabe)
+    if not treffer:
+        raise RuntimeError(f"Keine Durchsatzzeile in der Ausgabe von {' '.join(befehl)}")
+    nachrichten, nutzlast, dauer_s = int(treffer[1]), int(treffer[2]), float(treffer[3])
+    return nachrichten * nutzlast / dauer_s / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nutzlast-Sweep für Pipe_latenz, eine Messdatei je Konfiguration.")
+    parser.add_argument("--groessen", type=int, nargs="+", default=GROESSEN, help="Nutzlastgrößen in Byte")
+    parser.add_argument("--modi", nargs="+", choices=["pingpong", "durchsatz"], default=["pingpong", "durchsatz"])
+    parser.add_argument("--splice", action="store_true", help="zusätzlich die vmsplice/splice-Variante messen")
+    parser.add_argument("--pipe-groesse", type=int, default=0, help="Pipe-Kapazität per F_SETPIPE_SZ (Byte)")
+    parser.add_argument("--anzahl", type=int, default=100000, help="höchstens so viele Messwerte je Konfiguration")
+    parser.add_argument("--budget-mb", type=int, default=1024, help="übertragene Datenmenge je Konfiguration (MB, beide Richtungen; "
+                             f"mindestens {MIN_ANZAHL} Messwerte)")
+    parser.add_argument("--ausgabe", default="results/sweep", help="Ausgabeverzeichnis (Standard results/sweep)")
+    parser.add_argument("--csv", action="store_true", help="CSV statt Binärformat schreiben")
+    args = parser.parse_args()
+
+    if not os.path.exists(PROGRAMM):
+        print(f"{PROGRAMM} fehlt, bitte zuerst make ausführen.")
+        sys.exit(1)
+    os.makedirs(args.ausgabe, exist_ok=True)
+    binaer = not args.csv
+    varianten = [False, True] if args.splice else [False]
+
+    zeilen = []
+    print(f"{'Modus':<10} {'Variante':<8} {'Nutzlast [B]':>12} {'Anzahl':>8} {'Median [µs]':>12} "
+          f"{'Mittel [µs]':>12} {'MB/s':>10}")
+    for modus in args.modi:
+        for zero_copy in varianten:
+            for groesse in args.groessen:
+                anzahl = anzahl_fuer(groesse, modus, args.anzahl, args.budget_mb << 20)
+                pfad = os.path.join(args.ausgabe, dateiname(modus, zero_copy, args.pipe_groesse, groesse, binaer))
+                durchsatz = messe(groesse, modus, zero_copy, args.pipe_groesse, anzahl, pfad, binaer)
+
+                daten_ns = np.asarray(lade_messwerte(pfad))
+                median = float(np.median(daten_ns))
+                mittel = float(np.mean(daten_ns))
+                # Im Durchsatzmodus die Gesamtübertragung laut Pipe_latenz, im Ping-Pong-Modus
+                # Nutzlast je typischer (Median) Einweg-Zeit
+                mb_s = durchsatz if durchsatz is not None else groesse / median * 1e9 / 1e6
+                variante = "splice" if zero_copy else "copy"
+                zeilen.append((modus, variante, args.pipe_groesse, groesse, len(daten_ns), median, mittel, mb_s, pfad))
+                print(f"{modus:<10} {variante:<8} {groesse:>12} {len(daten_ns):>8} {median / 1000.0:>12.3f} "
+                      f"{mittel / 1000.0:>12.3f} {mb_s:>10.1f}")
+
+    uebersicht = os.path.join(args.ausgabe, "uebersicht.csv")
+    with open(uebersicht, "w") as f:
+        f.write("modus,variante,pipe_groesse,groesse_bytes,anzahl,median_ns,mittel_ns,mb_pro_s,datei\n")
+        for z in zeilen:
+            f.write(",".join(str(w) for w in z) + "\n")
+    print(f"\n{len(zeilen)} Messdateien und {uebersicht} geschrieben.")
+    print(f"Vergleich: python3 vergleiche_messungen.py '{args.ausgabe}/pipe_*'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib import cbook
+
+from messwerte_analyse import kennzahlen, lade_messwerte, neue_figur, speichere
+
+
+# Wahrscheinlichkeiten, an denen die CDF jeder Messung abgetastet wird: gleichmäßig im Körper,
+# logarithmisch dichter im Tail bis p99.9999, damit seltene Ausreißer sichtbar bleiben
+CDF_P = np.unique(np.concatenate((np.linspace(0.0, 0.99, 991), 1.0 - np.logspace(-2, -6, 200), [1.0])))
+
+# Höchstens so viele Ausreißer je Boxplot (immer einschließlich der Extremwerte)
+MAX_AUSREISSER = 2000
+
+
+def expandiere(muster: list[str]) -> list[str]:
+    """
+    Dateinamen und Glob-Muster (auch in Anführungszeichen übergeben) in der angegebenen Reihenfolge.
+    """
+    pfade = []
+    for m in muster:
+        treffer = sorted(glob.glob(m)) if glob.has_magic(m) else [m]
+        pfade.extend(p for p in treffer if p not in pfade)
+    return pfade
+
+
+def namen(pfade: list[str]) -> list[str]:
+    """
+    Eindeutige Kurznamen je Messung: Dateiname ohne Endung, bei Kollisionen der ganze Pfad
+    mit Endung (ipc_pipe.bin und ipc_pipe.csv), notfalls mit laufender Nummer.
+    """
+    kurz = [os.path.splitext(os.path.basename(p))[0] for p in pfade]
+    lang = [k if kurz.count(k) == 1 else p.replace(os.sep, "_").strip("_.") for k, p in zip(kurz, pfade)]
+    eindeutig = []
+    for name in lang:
+        kandidat, nummer = name, 2
+        while kandidat in eindeutig or (kandidat != name and kandidat in lang):
+            kandidat, nummer = f"{name}_{nummer}", nummer + 1
+        eindeutig.append(kandidat)
+    return eindeutig
+
+
+def analysiere(pfad: str) -> dict:
+    """
+    Lädt eine Messung und reduziert sie auf das, was der Vergleich braucht:
+    Kennzahlen, abgetastete CDF und Boxplot-Kennwerte (in µs). Die vollen Messwerte
+    verlassen den Worker-Prozess nicht.
+    """
+    daten_ns = lade_messwerte(pfad)
+    if len(daten_ns) == 0:
+        raise ValueError("keine gültigen Messwerte")
+    daten_us = np.asarray(daten_ns) / 1000.0
+
+    s = kennzahlen(daten_ns)
+    s["p999"] = float(np.percentile(daten_us, 99.9))
+
+    box = cbook.boxplot_stats(daten_us)[0]
+    ausreisser = np.sort(box["fliers"])
+    if len(ausreisser) > MAX_AUSREISSER:
+        ausreisser = ausreisser[np.linspace(0, len(ausreisser) - 1, MAX_AUSREISSER).astype(int)]
+    box["fliers"] = ausreisser
+
+    return {"statistik": s, "cdf": np.quantile(daten_us, CDF_P), "box": box}
+
+
+def _analysiere_sicher(pfad: str) -> dict | str:
+    # lade_messwerte beendet bei Fehlern den Prozess; im Vergleich soll nur diese Messung fehlen
+    try:
+        return analysiere(pfad)
+    except (Exception, SystemExit) as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def gib_tabelle_aus(ergebnisse: dict[str, dict]) -> None:
+    spalten = [("n", "n"), ("min", "Min"), ("median", "Median"), ("mean", "Mittel"), ("p95", "p95"),
+               ("p99", "p99"), ("p999", "p99.9"), ("max", "Max"), ("std", "Std")]
+    breite = max(len("Messung"), *(len(n) for n in ergebnisse))
+    print(f"{'Messung':<{breite}} " + " ".join(f"{titel:>10}" for _, titel in spalten) + "   [µs]")
+    for name, e in ergebnisse.items():
+        s = e["statistik"]
+        werte = [f"{s['n']:>10}"] + [f"{s[k]:>10.3f}" for k, _ in spalten[1:]]
+        print(f"{name:<{breite}} " + " ".join(werte))
+
+
+def schreibe_tabelle(pfad: str, ergebnisse: dict[str, dict]) -> None:
+    felder = ["n", "min", "max", "mean", "median", "std", "p90", "p95", "p99", "p999", "ci_unten", "ci_oben"]
+    with open(pfad, "w") as f:
+        f.write("messung," + ",".join(felder) + "\n")
+        for name, e in ergebnisse.items():
+            f.write(name + "," + ",".join(str(e["statistik"][k]) for k in felder) + "\n")
+
+
+def zeichne_cdf_vergleich(ergebnisse: dict[str, dict], dateiname: str) -> None:
+    """
+    Überlagerte empirische Verteilungsfunktionen aller Messungen (in µs, x-Achse logarithmisch).
+    """
+    fig, ax = neue_figur((9, 5))
+    for name, e in ergebnisse.items():
+        ax.plot(e["cdf"], CDF_P, linewidth=1.0, label=name)
+    ax.set_xscale("log")
+    ax.set_xlabel("Verweildauer (µs, log-Skala)")
+    ax.set_ylabel("Kumulative Wahrscheinlichkeit")
+    ax.set_title("Empirische Verteilungsfunktionen im Vergleich")
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+    ax.legend(fontsize="small")
+    speichere(fig, dateiname)
+
+
+def zeichne_boxplot_vergleich(ergebnisse: dict[str, dict], dateiname: str) -> None:
+    """
+    Boxplots aller Messungen nebeneinander (in µs, y-Achse logarithmisch).
+    """
+    boxen = [dict(e["box"], label=name) for name, e in ergebnisse.items()]
+    fig, ax = neue_figur((max(5, 1.2 * len(boxen) + 2), 6))
+    ax.bxp(boxen, showfliers=True)
+    ax.set_yscale("log")
+    ax.set_ylabel("Verweildauer (µs, log-Skala)")
+    ax.set_title("Boxplots im Vergleich")
+    ax.tick_params(axis="x", labelrotation=30)
+    ax.grid(True, axis="y", linewidth=0.3, alpha=0.5)
+    speichere(fig, dateiname)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht mehrere Messungen (CSV oder binär).")
+    parser.add_argument("pfade", nargs="+", help="Messdateien oder Glob-Muster, z. B. 'results/*.bin'")
+    parser.add_argument("--ausgabe", default="results/vergleich",
+                        help="Ausgabeverzeichnis; je Messung ein Unterverzeichnis (Standard results/vergleich)")
+    parser.add_argument("--prozesse", type=int, default=os.cpu_count() or 1,
+                        help="Anzahl paralleler Ladeprozesse (Standard: Anzahl CPUs)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    pfade = expandiere(args.pfade)
+    if not pfade:
+        print("Keine Messdateien gefunden.")
+        sys.exit(1)
+    kurznamen = namen(pfade)
+    # Gleiche Namen würden sich Tabellenzeile und Ausgabeverzeichnis teilen
+    assert len(set(kurznamen)) == len(kurznamen), f"Kurznamen nicht eindeutig: {kurznamen}"
+
+    ctx = mp.get_context("fork")
+    with ProcessPoolExecutor(max_workers=max(1, min(args.prozesse, len(pfade))), mp_context=ctx) as pool:
+        roh = list(pool.map(_analysiere_sicher, pfade))
+
+    ergebnisse = {}
+    for name, pfad, e in zip(kurznamen, pfade, roh):
+        if isinstance(e, str):
+            print(f"Überspringe {pfad}: {e}")
+            continue
+        ergebnisse[name] = e
+        # Ergebnisse je Messung in einem eigenen Unterverzeichnis
+        verzeichnis = os.path.join(args.ausgabe, name)
+        os.makedirs(verzeichnis, exist_ok=True)
+        with open(os.path.join(verzeichnis, "statistik.json"), "w") as f:
+            json.dump({"quelle": pfad, **e["statistik"]}, f, indent=2)
+    if not ergebnisse:
+        print("Keine Messung konnte geladen werden.")
+        sys.exit(1)
+    geladen = time.perf_counter()
+
+    print()
+    gib_tabelle_aus(ergebnisse)
+    print("\nErzeuge Vergleich...\n")
+    tabelle = os.path.join(args.ausgabe, "vergleich.csv")
+    schreibe_tabelle(tabelle, ergebnisse)
+    print(f"  {tabelle}")
+    for zeichne, datei in ((zeichne_cdf_vergleich, "vergleich_cdf.png"),
+                           (zeichne_boxplot_vergleich, "vergleich_boxplot.png")):
+        dateiname = os.path.join(args.ausgabe, datei)
+        zeichne(ergebnisse, dateiname)
+        print(f"  {dateiname}")
+
+    ende = time.perf_counter()
+    print(f"\nFertig. {len(ergebnisse)} Messungen verglichen in {ende - start:.2f} s "
+          f"(Laden und Statistik {geladen - start:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()